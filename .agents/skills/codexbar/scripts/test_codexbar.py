@@ -2,20 +2,112 @@ from __future__ import annotations
 
 import json
 import os
+import random
 import runpy
+import shutil
+import socket
 import subprocess
 import sys
 import tempfile
 import textwrap
+import threading
 import time
 import unittest
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from typing import Iterator
 
 
 SCRIPT = Path(__file__).with_name("codexbar")
 MODULE = runpy.run_path(str(SCRIPT), run_name="codexbar_skill")
 MAX_CAPTURE_BYTES = MODULE["MAX_CAPTURE_BYTES"]
 run_process = MODULE["run_process"]
+sanitize = MODULE["sanitize"]
+sanitize_text = MODULE["sanitize_text"]
+
+
+def reference_sanitize_text(value: str, include_identities: bool) -> str:
+    """The text rules as a plain chain of substitutions; the fast path must match it exactly."""
+    value = MODULE["JWT_RE"].sub(MODULE["SECRET"], value)
+    value = MODULE["BEARER_RE"].sub("Bearer " + MODULE["SECRET"], value)
+    value = MODULE["LABELED_SECRET_RE"].sub(lambda match: match.group(1) + match.group(2) + MODULE["SECRET"], value)
+    value = MODULE["WORD_SECRET_RE"].sub(lambda match: match.group(1) + " " + MODULE["SECRET"], value)
+    if not include_identities:
+        value = MODULE["EMAIL_RE"].sub(MODULE["EMAIL"], value)
+    return value
+
+
+def reference_sanitize(value: object, include_identities: bool, key: str | None = None) -> object:
+    if key and MODULE["SECRET_KEY_RE"].search(key):
+        return MODULE["SECRET"]
+    normalized = MODULE["normalized_key"](key) if key else ""
+    if normalized in MODULE["IDENTITY_KEYS"] and not include_identities and value is not None:
+        return MODULE["EMAIL"] if "email" in normalized else MODULE["IDENTITY"]
+    if isinstance(value, dict):
+        return {str(name): reference_sanitize(child, include_identities, str(name)) for name, child in value.items()}
+    if isinstance(value, list):
+        return [reference_sanitize(child, include_identities) for child in value]
+    if isinstance(value, str):
+        return reference_sanitize_text(value, include_identities)
+    return value
+
+
+FRAGMENTS = [
+    "Bearer abc.def-123",
+    "bEaReR",
+    "Authorization: Bearer sk-live-1234567890",
+    "authorization=xyz",
+    "api_key=SECRET1",
+    "API-KEY : v",
+    "apikey:",
+    "access_token=aaa;",
+    "refresh-token: r",
+    "id_token=eyJhbGciOi.eyJzdWIi.sig_nature",
+    "eyJabc.def.ghi",
+    "eyJonly",
+    "sessionid=42",
+    "Session: s",
+    "set-cookie: a=b",
+    "cookie abcdefgh",
+    "password hunter22",
+    "passwd: x",
+    "secret 123456",
+    "token short",
+    "token abcdef",
+    "tokens",
+    "alice@example.com",
+    "a@b",
+    "x@y.co",
+    "mailto:bob.smith+tag@mail.example.org",
+    "<redacted:secret>",
+    "ſecret: folded",
+    "authorızation: folded",
+    "\u212aey",
+    "AUTHORIZATION",
+    "é",
+    "\u0130d_token=x",
+    "codex",
+    "2026-10-17T08:00:00Z",
+    "42%",
+]
+
+
+def random_text(rng: random.Random) -> str:
+    separators = ["", " ", ", ", "; ", "=", ":", "\n", "/"]
+    return "".join(rng.choice(FRAGMENTS) + rng.choice(separators) for _ in range(rng.randint(0, 6)))
+
+
+def random_payload(rng: random.Random, depth: int = 0) -> object:
+    roll = rng.random()
+    if depth < 4 and roll < 0.3:
+        keys = ["accountEmail", "email", "user_name", "providerID", "apiKey", "notes", "", "Token", "Organization", "x"]
+        return {
+            rng.choice(keys) + rng.choice(["", "2"]): random_payload(rng, depth + 1) for _ in range(rng.randint(0, 5))
+        }
+    if depth < 4 and roll < 0.5:
+        return [random_payload(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return rng.choice([None, True, 3, 2.5, random_text(rng), random_text(rng)])
 
 FAKE = textwrap.dedent(
     """\
@@ -52,14 +144,29 @@ FAKE = textwrap.dedent(
         ])
         time.sleep(5)
 
-    delay = os.environ.get(f"FAKE_{key}_DELAY")
+    provider = argv[argv.index("--provider") + 1].upper() if "--provider" in argv[:-1] else ""
+
+    def setting(name, default=""):
+        return os.environ.get(f"FAKE_{key}_{provider}_{name}", os.environ.get(f"FAKE_{key}_{name}", default))
+
+    delay = setting("DELAY")
     if delay:
         time.sleep(float(delay))
-    stdout = os.environ.get(f"FAKE_{key}_STDOUT", "")
-    stderr = os.environ.get(f"FAKE_{key}_STDERR", "")
-    sys.stdout.write(stdout)
-    sys.stderr.write(stderr)
-    raise SystemExit(int(os.environ.get(f"FAKE_{key}_EXIT", "0")))
+    items = setting("ITEMS")
+    outputs = setting("STDOUTS")
+    if outputs:
+        with open(log, encoding="utf-8") as handle:
+            seen = sum(1 for line in handle if json.loads(line)[:1] == argv[:1]) - 1
+        values = json.loads(outputs)
+        sys.stdout.write(values[min(seen, len(values) - 1)])
+    elif items:
+        for index in range(int(items)):
+            sys.stdout.write(("," if index else "[") + setting("STDOUT"))
+        sys.stdout.write("]")
+    else:
+        sys.stdout.write(setting("STDOUT") * int(setting("REPEAT", "1")))
+    sys.stderr.write(setting("STDERR"))
+    raise SystemExit(int(setting("EXIT", "0")))
     """
 )
 
@@ -73,6 +180,11 @@ def make_env(root: Path, *, install: bool = True) -> tuple[dict[str, str], Path]
     env["CODEXBAR_SKIP_DISCOVERY"] = "1"
     env["CODEXBAR_TIMEOUT"] = "3"
     env["FAKE_LOG"] = str(root / "argv.log")
+    env["CODEXBAR_CACHE_DIR"] = str(root / "cache")
+    env.pop("CODEXBAR_CACHE_TTL", None)
+    env.pop("CODEXBAR_CACHE_STALE", None)
+    env["CODEXBAR_SERVE_URL"] = "off"
+    env.pop("CODEXBAR_DASHBOARD_TOKEN", None)
     env["FAKE_VERSION_STDOUT"] = "CodexBar 1.2.3\n"
     env["FAKE_VALIDATE_STDOUT"] = "[]"
     env["FAKE_PROVIDERS_STDOUT"] = json.dumps(
@@ -111,6 +223,56 @@ def helper(*args: str, env: dict[str, str], cwd: Path | None = None) -> subproce
     )
 
 
+def calls(root: Path) -> list[list[str]]:
+    log = root / "argv.log"
+    return [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+
+
+@contextmanager
+def fake_serve(
+    usage: str, status: int = 200, snapshot: str | None = None, host: str = "127.0.0.1"
+) -> Iterator[list[dict[str, str]]]:
+    """A minimal `codexbar serve`: /health, a canned /usage and optional snapshot; yields the request log."""
+    requests: list[dict[str, str]] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            requests.append(
+                {
+                    "path": self.path,
+                    "authorization": self.headers.get("Authorization", ""),
+                    "client": str(self.client_address[1]),
+                }
+            )
+            if self.path == "/health":
+                code, body = 200, json.dumps({"status": "ok", "version": "1.2.3"})
+            elif self.path.startswith("/dashboard/v1/snapshot"):
+                code, body = (200, snapshot) if snapshot else (401, json.dumps({"error": "unauthorized"}))
+            else:
+                code, body = status, usage if status == 200 else json.dumps({"error": "nope"})
+            data = body.encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        requests.append({"url": f"http://127.0.0.1:{server.server_address[1]}"})
+        yield requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
 class CodexBarSkillTests(unittest.TestCase):
     def test_help_is_small_and_read_only(self) -> None:
         result = helper("--help", env=os.environ.copy())
@@ -136,6 +298,38 @@ class CodexBarSkillTests(unittest.TestCase):
         self.assertEqual(payload["configIssues"], [])
         self.assertEqual(payload["binary"]["path"], "~" + str(binary)[len(str(Path.home())) :])
 
+    def test_doctor_probes_run_concurrently_under_one_deadline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, _ = make_env(Path(tmp))
+            for key in ("VERSION", "VALIDATE", "PROVIDERS"):
+                env[f"FAKE_{key}_DELAY"] = "0.8"
+            started = time.monotonic()
+            result = helper("doctor", "--providers", env=env)
+            elapsed = time.monotonic() - started
+        self.assertEqual(result.returncode, 0)
+        payload = json.loads(result.stdout)
+        self.assertEqual(payload["providers"], ["codex"])
+        self.assertEqual(sorted(payload["probes"]), ["configValidate", "providers", "version"])
+        self.assertTrue(all(probe["seconds"] >= 0.8 and not probe["timedOut"] for probe in payload["probes"].values()))
+        self.assertLess(elapsed, 2.0)
+
+    def test_doctor_reports_a_late_probe_without_hiding_the_others(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, _ = make_env(Path(tmp))
+            env["CODEXBAR_TIMEOUT"] = "1"
+            env["FAKE_VERSION_DELAY"] = "10"
+            started = time.monotonic()
+            result = helper("doctor", env=env)
+            elapsed = time.monotonic() - started
+        self.assertEqual(result.returncode, 124)
+        payload = json.loads(result.stdout)
+        self.assertIsNone(payload["version"])
+        self.assertTrue(payload["probes"]["version"]["timedOut"])
+        self.assertFalse(payload["probes"]["configValidate"]["timedOut"])
+        self.assertEqual(payload["configIssues"], [])
+        self.assertNotIn("providers", payload)
+        self.assertLess(elapsed, 4.5)
+
     def test_providers_passes_upstream_json_without_second_schema(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             env, _ = make_env(Path(tmp))
@@ -195,6 +389,406 @@ class CodexBarSkillTests(unittest.TestCase):
         self.assertEqual(usage["accountEmail"], "alice@example.com")
         self.assertEqual(usage["apiKey"], "<redacted:secret>")
 
+    def test_large_payload_streams_past_the_capture_cap(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, _ = make_env(Path(tmp))
+            entry = json.loads(env["FAKE_USAGE_STDOUT"])[0]
+            entry["usage"]["notes"] = "x" * 1000
+            env["FAKE_USAGE_STDOUT"] = json.dumps(entry)
+            env["FAKE_USAGE_ITEMS"] = "3000"
+            result = helper("usage", env=env)
+        self.assertEqual(result.returncode, 0, result.stdout[:400])
+        payload = json.loads(result.stdout)
+        self.assertGreater(len(result.stdout), 3 * 1024 * 1024)
+        self.assertEqual(len(payload), 3000)
+        self.assertEqual({item["usage"]["accountEmail"] for item in payload}, {"<redacted:email>"})
+        self.assertEqual(result.stdout, json.dumps(payload, indent=2, sort_keys=True) + "\n")
+
+    def test_non_json_output_is_still_capped(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, _ = make_env(Path(tmp))
+            env["FAKE_USAGE_STDOUT"] = "not json " * 1000
+            env["FAKE_USAGE_REPEAT"] = "300"
+            unterminated = dict(env, FAKE_USAGE_STDOUT='[{"provider": "codex"}, {"provi', FAKE_USAGE_REPEAT="1")
+            garbage = helper("usage", env=env)
+            truncated = helper("usage", env=unterminated)
+        self.assertEqual(json.loads(garbage.stdout)["error"]["kind"], "invalid_json")
+        self.assertIn("exceeded", json.loads(garbage.stdout)["error"]["message"])
+        self.assertEqual(json.loads(truncated.stdout)["error"]["kind"], "invalid_json")
+
+    def test_sanitize_text_matches_the_reference_rules(self) -> None:
+        rng = random.Random(16)
+        for _ in range(5000):
+            text = random_text(rng)
+            for include_identities in (False, True):
+                self.assertEqual(
+                    sanitize_text(text, include_identities), reference_sanitize_text(text, include_identities), text
+                )
+
+    def test_sanitize_matches_the_reference_rules(self) -> None:
+        rng = random.Random(61)
+        for _ in range(1000):
+            payload = random_payload(rng)
+            for include_identities in (False, True):
+                self.assertEqual(sanitize(payload, include_identities), reference_sanitize(payload, include_identities))
+
+    def test_sanitize_handles_deep_nesting(self) -> None:
+        payload: object = {"accountEmail": "alice@example.com"}
+        for _ in range(sys.getrecursionlimit() * 2):
+            payload = [payload]
+        result = sanitize(payload, False)
+        while isinstance(result, list):
+            result = result[0]
+        self.assertEqual(result, {"accountEmail": "<redacted:email>"})
+
+    def test_fan_out_keeps_healthy_providers_when_one_is_late(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            env["CODEXBAR_TIMEOUT"] = "1"
+            env["FAKE_PROVIDERS_STDOUT"] = json.dumps(
+                [{"provider": name, "enabled": False} for name in ("zai", "codex", "slow", "claude")]
+            )
+            for name in ("zai", "codex", "slow", "claude"):
+                env[f"FAKE_USAGE_{name.upper()}_STDOUT"] = json.dumps([{"provider": name, "usage": {"primary": {}}}])
+                env[f"FAKE_USAGE_{name.upper()}_DELAY"] = "0.6"
+            env["FAKE_USAGE_SLOW_DELAY"] = "10"
+            started = time.monotonic()
+            result = helper("usage", "--all", "--fan-out", env=env)
+            elapsed = time.monotonic() - started
+            usage_calls = [call[-1] for call in calls(root) if call[0] == "usage"]
+        payload = json.loads(result.stdout)
+        self.assertEqual(result.returncode, 124)
+        self.assertEqual([entry["provider"] for entry in payload], ["zai", "codex", "slow", "claude"])
+        self.assertEqual(payload[2]["error"]["kind"], "timeout")
+        self.assertTrue(all("error" not in entry for index, entry in enumerate(payload) if index != 2))
+        self.assertEqual(sorted(usage_calls), ["claude", "codex", "slow", "zai"])
+        self.assertLess(elapsed, 3.5)
+
+    def test_fan_out_reads_share_one_deadline_beyond_the_worker_pool(self) -> None:
+        names = [f"p{index}" for index in range(16)]
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            env["CODEXBAR_TIMEOUT"] = "1"
+            env["FAKE_PROVIDERS_STDOUT"] = json.dumps([{"provider": name} for name in names])
+            env["FAKE_PROVIDERS_DELAY"] = "0.4"
+            env["FAKE_USAGE_DELAY"] = "10"
+            started = time.monotonic()
+            result = helper("usage", "--all", "--fan-out", env=env)
+            elapsed = time.monotonic() - started
+        payload = json.loads(result.stdout)
+        self.assertEqual(result.returncode, 124)
+        self.assertEqual([entry["provider"] for entry in payload], names)
+        self.assertTrue(all(entry["error"]["kind"] == "timeout" for entry in payload))
+        # Reads queued behind the first eight only get what is left of the one deadline.
+        self.assertLess(elapsed, 1.9)
+
+    def test_fan_out_falls_back_to_single_read_without_provider_list(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            env["FAKE_PROVIDERS_EXIT"] = "1"
+            result = helper("usage", "--all", "--fan-out", env=env)
+            usage_calls = [call for call in calls(root) if call[0] == "usage"]
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(json.loads(result.stdout)[0]["provider"], "codex")
+        self.assertEqual(usage_calls, [["usage", "--format", "json", "--json-only", "--provider", "all"]])
+
+    def test_fan_out_requires_all(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, _ = make_env(Path(tmp))
+            result = helper("usage", "--fan-out", env=env)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--fan-out requires --all", result.stderr)
+
+    def test_timings_report_phases_on_stderr_only(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, _ = make_env(Path(tmp))
+            plain = helper("usage", env=env)
+            timed = helper("usage", "--timings", env=env)
+        self.assertEqual(timed.returncode, 0)
+        self.assertEqual(timed.stdout, plain.stdout)
+        self.assertNotIn("timings", plain.stderr)
+        report = json.loads(timed.stderr.splitlines()[-1])["timings"]
+        phases = {phase["phase"]: phase for phase in report["phases"]}
+        self.assertLessEqual({"discovery", "spawn", "wait", "drain", "decode", "sanitize", "emit"}, set(phases))
+        self.assertEqual(phases["wait"]["command"], "usage")
+        self.assertEqual(phases["wait"]["exitCode"], 0)
+        self.assertEqual(phases["drain"]["stdoutBytes"], len(env["FAKE_USAGE_STDOUT"].encode()))
+        self.assertFalse(phases["drain"]["stdoutTruncated"])
+        self.assertGreaterEqual(report["totalMs"], max(phase["atMs"] for phase in report["phases"]))
+
+    def test_timings_env_labels_fan_out_reads_per_provider(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, _ = make_env(Path(tmp))
+            env["CODEXBAR_TIMINGS"] = "1"
+            env["FAKE_PROVIDERS_STDOUT"] = json.dumps([{"provider": name} for name in ("codex", "claude")])
+            result = helper("usage", "--all", "--fan-out", env=env)
+        phases = json.loads(result.stderr.splitlines()[-1])["timings"]["phases"]
+        waits = sorted(phase["command"] for phase in phases if phase["phase"] == "wait")
+        self.assertEqual(waits, ["config providers", "usage --provider claude", "usage --provider codex"])
+        self.assertIn("usage --fan-out", [phase.get("command") for phase in phases if phase["phase"] == "sanitize"])
+
+    def test_serve_answers_usage_without_spawning_the_cli(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            with fake_serve(env["FAKE_USAGE_STDOUT"]) as requests:
+                env["CODEXBAR_SERVE_URL"] = requests.pop(0)["url"]
+                env["CODEXBAR_DASHBOARD_TOKEN"] = "dash-token"
+                result = helper("usage", "--provider", "zai", env=env)
+            usage_calls = [call for call in calls(root) if call[0] == "usage"]
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(usage_calls, [])
+        self.assertEqual([request["path"] for request in requests], ["/health", "/usage?provider=zai"])
+        self.assertEqual([request["authorization"] for request in requests], ["", "Bearer dash-token"])
+        self.assertEqual(len({request["client"] for request in requests}), 1)
+        usage = json.loads(result.stdout)[0]["usage"]
+        self.assertEqual(usage["accountEmail"], "<redacted:email>")
+        self.assertEqual(usage["identity"]["providerID"], "codex")
+        self.assertNotIn("dash-token", result.stdout + result.stderr)
+
+    def test_serve_on_a_non_loopback_host_is_never_sent_the_token(self) -> None:
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            # No packet is sent; this only asks which local address would route outward.
+            probe.connect(("192.0.2.1", 9))
+            address = probe.getsockname()[0]
+        except OSError:
+            address = "127.0.0.1"
+        finally:
+            probe.close()
+        if address.startswith("127."):
+            self.skipTest("no non-loopback interface")
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            with fake_serve(env["FAKE_USAGE_STDOUT"], host="0.0.0.0") as requests:
+                port = requests.pop(0)["url"].rsplit(":", 1)[1]
+                env["CODEXBAR_SERVE_URL"] = f"http://{address}:{port}"
+                env["CODEXBAR_DASHBOARD_TOKEN"] = "dash-token"
+                result = helper("usage", "--provider", "codex", env=env)
+            usage_calls = [call for call in calls(root) if call[0] == "usage"]
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(requests, [])
+        self.assertEqual(len(usage_calls), 1)
+
+    def test_serve_errors_fall_back_to_the_cli_except_timeouts(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            with fake_serve("", status=401) as requests:
+                env["CODEXBAR_SERVE_URL"] = requests.pop(0)["url"]
+                denied = helper("usage", "--all", env=env)
+            with fake_serve("", status=504) as requests:
+                env["CODEXBAR_SERVE_URL"] = requests.pop(0)["url"]
+                timed_out = helper("usage", "--all", env=env)
+            env["CODEXBAR_SERVE_URL"] = "http://127.0.0.1:9"
+            absent = helper("usage", "--all", env=env)
+            usage_calls = [call for call in calls(root) if call[0] == "usage"]
+        self.assertEqual(denied.returncode, 0)
+        self.assertEqual(json.loads(denied.stdout)[0]["usage"]["accountEmail"], "<redacted:email>")
+        self.assertEqual(timed_out.returncode, 124)
+        self.assertEqual(json.loads(timed_out.stdout)["error"]["kind"], "timeout")
+        self.assertEqual(absent.returncode, 0)
+        self.assertEqual(len(usage_calls), 2)
+
+    def test_batch_runs_queries_concurrently_under_one_deadline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            env["CODEXBAR_TIMEOUT"] = "1"
+            env["FAKE_USAGE_STDERR"] = "token sk-live-batch-secret\n"
+            env["FAKE_USAGE_SLOW_DELAY"] = "10"
+            for key in ("VERSION", "VALIDATE", "PROVIDERS", "USAGE"):
+                env[f"FAKE_{key}_DELAY"] = "0.6"
+            queries = ["doctor", "providers", "usage --provider codex", "usage --provider slow"]
+            queries.append("usage --provider codex")
+            started = time.monotonic()
+            result = helper("batch", *(arg for query in queries for arg in ("--query", query)), env=env)
+            elapsed = time.monotonic() - started
+            spawned = calls(root)
+        self.assertEqual(result.returncode, 124)
+        report = json.loads(result.stdout)
+        self.assertEqual(sorted(report), ["doctor", "providers", "usage --provider codex", "usage --provider slow"])
+        self.assertEqual(report["doctor"]["result"]["version"], "CodexBar 1.2.3")
+        self.assertEqual(report["providers"]["result"][0]["provider"], "codex")
+        codex = report["usage --provider codex"]
+        self.assertEqual(codex["exitCode"], 0)
+        self.assertEqual(codex["result"][0]["usage"]["accountEmail"], "<redacted:email>")
+        self.assertNotIn("sk-live-batch-secret", result.stdout + result.stderr)
+        self.assertEqual(report["usage --provider slow"]["error"]["kind"], "timeout")
+        self.assertEqual(len(spawned), 5)
+        self.assertLess(elapsed, 4.0)
+
+    def test_batch_reads_queries_from_stdin_and_keeps_the_allowlist(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+
+            def run(payload: str) -> subprocess.CompletedProcess[str]:
+                command = [sys.executable, str(SCRIPT), "batch"]
+                return subprocess.run(command, input=payload, capture_output=True, text=True, env=env, check=False)
+
+            ok = run(json.dumps([["usage", "--all"], "providers --include-identities"]))
+            rejected = [run(json.dumps(query)) for query in (["config set x"], ["batch"], ["usage --fan-out"], {})]
+            spawned = calls(root)
+        self.assertEqual(ok.returncode, 0)
+        self.assertEqual(sorted(json.loads(ok.stdout)), ["providers --include-identities", "usage --all"])
+        self.assertEqual([result.returncode for result in rejected], [2, 2, 2, 2])
+        self.assertEqual(len(spawned), 2)
+
+    def test_watch_prints_only_changed_windows(self) -> None:
+        def usage(primary: int, reset: str) -> str:
+            windows = {"primary": {"usedPercent": primary, "resetsAt": reset}, "secondary": {"usedPercent": 50}}
+            return json.dumps([{"provider": "codex", "usage": {"accountEmail": "alice@example.com", **windows}}])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            reset = "2026-10-17T10:00:00Z"
+            env["FAKE_USAGE_STDOUTS"] = json.dumps([usage(10, reset), usage(12, reset), usage(12, reset)])
+            result = helper("watch", "--interval", "1", "--count", "3", env=env)
+            spawned = [call for call in calls(root) if call[0] == "usage"]
+        self.assertEqual(result.returncode, 0)
+        events = [json.loads(line) for line in result.stdout.splitlines()]
+        changes = [(event["window"], event["usedPercent"]) for event in events]
+        self.assertEqual(changes, [("primary", 10), ("secondary", 50), ("primary", 12)])
+        self.assertEqual(events[2]["previous"], {"usedPercent": 10, "resetsAt": "2026-10-17T10:00:00Z"})
+        self.assertEqual({event["source"] for event in events}, {"cli"})
+        self.assertNotIn("alice", result.stdout)
+        self.assertEqual(len(spawned), 3)
+
+    def test_watch_uses_the_serve_snapshot_when_available(self) -> None:
+        snapshot = {
+            "schemaVersion": 1,
+            "providers": [
+                {
+                    "id": "codex",
+                    "identity": {"accountEmail": "alice@example.com"},
+                    "windows": [{"kind": "session", "usedPercent": 28, "resetAt": "2026-10-17T17:15:00Z"}],
+                    "error": None,
+                }
+            ],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            with fake_serve("[]", snapshot=json.dumps(snapshot)) as requests:
+                env["CODEXBAR_SERVE_URL"] = requests.pop(0)["url"]
+                env["CODEXBAR_DASHBOARD_TOKEN"] = "dash-token"
+                result = helper("watch", "--provider", "codex", "--count", "1", env=env)
+            spawned = calls(root)
+        self.assertEqual(result.returncode, 0)
+        event = json.loads(result.stdout)
+        self.assertEqual((event["source"], event["window"], event["usedPercent"]), ("serve", "session", 28))
+        self.assertEqual(requests[-1]["path"], "/dashboard/v1/snapshot?provider=codex")
+        self.assertEqual(requests[-1]["authorization"], "Bearer dash-token")
+        self.assertEqual(spawned, [])
+
+    def test_cache_is_opt_in(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            helper("usage", env=env)
+            helper("usage", env=env)
+            self.assertEqual(len(calls(root)), 2)
+            self.assertFalse((root / "cache").exists())
+
+    def test_binary_resolution_is_cached_until_the_file_changes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, binary = make_env(root)
+            env["CODEXBAR_CACHE_TTL"] = "60"
+            record = root / "cache" / "binary.json"
+            self.assertEqual(json.loads(helper("doctor", env=env).stdout)["binary"]["source"], "env")
+            entry = json.loads(record.read_text())
+            self.assertEqual(entry["path"], str(binary.resolve()))
+            record.write_text(json.dumps({**entry, "source": "remembered"}))
+            self.assertEqual(json.loads(helper("doctor", env=env).stdout)["binary"]["source"], "remembered")
+            binary.write_text(binary.read_text() + "\n", encoding="utf-8")
+            self.assertEqual(json.loads(helper("doctor", env=env).stdout)["binary"]["source"], "env")
+            record.write_text(json.dumps({**json.loads(record.read_text()), "source": "remembered"}))
+            env["PATH"] = "/usr/bin:/bin"
+            self.assertEqual(json.loads(helper("doctor", env=env).stdout)["binary"]["source"], "env")
+            binary.unlink()
+            missing = helper("doctor", env=env)
+        self.assertEqual(json.loads(missing.stdout)["error"]["kind"], "missing")
+
+    def test_remembered_binary_yields_to_a_new_higher_precedence_install(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, binary = make_env(root)
+            env["CODEXBAR_CACHE_TTL"] = "60"
+            env.pop("CODEXBAR_BIN")
+            early, late = root / "early", root / "late"
+            early.mkdir()
+            late.mkdir()
+            shutil.copy2(binary, late / "codexbar")
+            env["PATH"] = f"{early}:{late}:{env['PATH']}"
+            first = json.loads(helper("doctor", env=env).stdout)["binary"]["path"]
+            shutil.copy2(binary, early / "codexbar")
+            second = json.loads(helper("doctor", env=env).stdout)["binary"]["path"]
+        self.assertEqual(first, str((late / "codexbar").resolve()))
+        self.assertEqual(second, str((early / "codexbar").resolve()))
+
+    def test_cache_serves_repeat_reads_per_argv_mode_and_binary(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, binary = make_env(root)
+            env["CODEXBAR_CACHE_TTL"] = "60"
+            env["FAKE_USAGE_STDERR"] = "token sk-live-prose-secret\n"
+            first = helper("usage", env=env)
+            env["FAKE_USAGE_STDOUT"] = "[]"
+            second = helper("usage", env=env)
+            self.assertEqual(len(calls(root)), 1)
+            helper("usage", "--include-identities", env=env)
+            helper("usage", "--provider", "codex", env=env)
+            self.assertEqual(len(calls(root)), 3)
+            os.utime(binary, (time.time() + 10, time.time() + 10))
+            third = helper("usage", env=env)
+            self.assertEqual(len(calls(root)), 4)
+            stored = "".join(path.read_text() for path in (root / "cache").glob("*.json"))
+        self.assertEqual(second.stdout, first.stdout)
+        self.assertEqual(second.stderr, first.stderr)
+        self.assertEqual(json.loads(third.stdout), [])
+        self.assertNotIn("alice@example.com", stored)
+        self.assertNotIn("sk-live-prose-secret", stored)
+
+    def test_cache_skips_failed_reads(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            env["CODEXBAR_CACHE_TTL"] = "60"
+            env["FAKE_USAGE_EXIT"] = "1"
+            helper("usage", env=env)
+            helper("usage", env=env)
+            env["FAKE_USAGE_STDOUT"] = "not json"
+            env["FAKE_USAGE_EXIT"] = "0"
+            helper("usage", env=env)
+            helper("usage", env=env)
+            self.assertEqual(len(calls(root)), 4)
+
+    def test_stale_entry_is_served_while_revalidating(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env, _ = make_env(root)
+            env["CODEXBAR_CACHE_TTL"] = "1"
+            env["CODEXBAR_CACHE_STALE"] = "60"
+            first = helper("usage", env=env)
+            time.sleep(1.1)
+            env["FAKE_USAGE_STDOUT"] = "[]"
+            stale = helper("usage", env=env)
+            deadline = time.monotonic() + 5
+            while len(calls(root)) < 2 or list((root / "cache").glob("*.lock")):
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+            fresh = helper("usage", env=env)
+            self.assertEqual(len(calls(root)), 2)
+        self.assertEqual(stale.stdout, first.stdout)
+        self.assertEqual(json.loads(fresh.stdout), [])
+
     def test_each_stream_is_capped_while_fully_drained(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             root = Path(tmp)
@@ -4,14 +4,51 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import math
 import os
+import platform
 import re
+import shutil
 import signal
 import subprocess
 import sys
+import tempfile
+import threading
 import time
 from collections.abc import Iterable
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, TextIO
+from xml.etree import ElementTree
+
+DURATION_HISTORY_VERSION = 1
+DISCOVERY_CACHE_VERSION = 1
+REPORT_VERSION = 1
+LEDGER_VERSION = 1
+# Runs kept per selection in the ledger, and how they are judged.
+LEDGER_WINDOW = 20
+FLAKY_MIN_RETRY_PASSES = 2
+SLOW_TREND_RECENT_RUNS = 3
+SLOW_TREND_RATIO = 1.5
+SLOW_TREND_MIN_SECONDS = 1.0
+# Everything `swift test list` output depends on, relative to the package root.
+DISCOVERY_INPUT_FILES = ("Package.swift", "Package.resolved")
+DISCOVERY_INPUT_DIRECTORIES = ("Tests", "TestsLinux", "TestsPlugin")
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Weight of the newest measurement when updating a selection's recorded duration.
+DURATION_SMOOTHING = 0.5
+# Counters updated while running a group; concurrent groups count into their own RunStats and are merged.
+GROUP_COUNTERS = (
+    "first_pass_successful_groups",
+    "first_pass_failed_groups",
+    "full_group_retries",
+    "timed_out_groups",
+    "recovered_groups",
+    "isolated_selection_retries",
+    "bisection_steps",
+)
 
 
 @dataclass(frozen=True)
@@ -21,6 +58,12 @@ class TestSelection:
     suite_name: str | None = None
 
 
+def listed(names: list[str] | None) -> str:
+    if names is None:
+        return "off"
+    return ", ".join(names) or "none"
+
+
 @dataclass
 class RunStats:
     discovered_selections: int = 0
@@ -30,6 +73,7 @@ class RunStats:
     shard_index: int | None = None
     shard_count: int | None = None
     discovery_seconds: float = 0
+    discovery_cache: str = "off"
     execution_seconds: float = 0
     total_seconds: float = 0
     first_pass_successful_groups: int = 0
@@ -38,6 +82,19 @@ class RunStats:
     timed_out_groups: int = 0
     recovered_groups: int = 0
     isolated_selection_retries: int = 0
+    bisection_steps: int = 0
+    hung_selections: list[str] = field(default_factory=list)
+    flaky_selections: list[str] | None = None
+    slow_trending_selections: list[str] | None = None
+    known_duration_selections: int = 0
+    predicted_seconds: float = 0
+    shard_predictions: list[float] = field(default_factory=list)
+    workers: int = 1
+
+    def add_group_counts(self, other: RunStats) -> None:
+        for counter in GROUP_COUNTERS:
+            setattr(self, counter, getattr(self, counter) + getattr(other, counter))
+        self.hung_selections.extend(other.hung_selections)
 
     def summary_rows(self) -> list[tuple[str, str]]:
         shard = "none"
@@ -46,6 +103,7 @@ class RunStats:
         return [
             ("Shard", shard),
             ("Group size", str(self.group_size)),
+            ("Workers", str(self.workers)),
             ("Discovered selections", str(self.discovered_selections)),
             ("Selected selections", str(self.selected_selections)),
             ("Selected groups", str(self.selected_groups)),
@@ -55,12 +113,40 @@ class RunStats:
             ("Recovered groups", str(self.recovered_groups)),
             ("Timed out groups", str(self.timed_out_groups)),
             ("Isolated selection retries", str(self.isolated_selection_retries)),
+            ("Bisection steps", str(self.bisection_steps)),
+            ("Hung selections", ", ".join(self.hung_selections) or "none"),
+            ("Flaky selections", listed(self.flaky_selections)),
+            ("Slow-trending selections", listed(self.slow_trending_selections)),
+            ("Known-duration selections", f"{self.known_duration_selections}/{self.selected_selections}"),
+            ("Predicted execution seconds", f"{self.predicted_seconds:.1f}"),
+            ("Discovery cache", self.discovery_cache),
             ("Discovery seconds", f"{self.discovery_seconds:.1f}"),
             ("Execution seconds", f"{self.execution_seconds:.1f}"),
             ("Total seconds", f"{self.total_seconds:.1f}"),
         ]
 
 
+@dataclass(frozen=True)
+class GroupAttempt:
+    group_index: int
+    kind: str
+    selections: tuple[str, ...]
+    seconds: float
+    exit_code: int
+
+
+@dataclass(frozen=True)
+class GroupRunner:
+    timeout: int
+    swift_command: list[str]
+    durations: dict[str, float] | None = None
+    # Concurrent groups share one .build; SwiftPM's scratch-directory lock would otherwise serialize them.
+    ignore_lock: bool = False
+    log: TextIO | None = None
+    attempts: list[GroupAttempt] = field(default_factory=list)
+    group_index: int = 0
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument("--group-size", type=int, default=12)
@@ -74,19 +160,56 @@ def parse_args() -> argparse.Namespace:
         dest="retry_non_timeout_failures",
         help="fail immediately when a group exits without timing out",
     )
+    parser.add_argument(
+        "--timeout-recovery",
+        choices=("individual", "bisect"),
+        default="individual",
+        help="after a group times out, rerun each selection alone or bisect down to the hanging one",
+    )
+    parser.add_argument(
+        "--durations",
+        help="JSON duration history: read to balance groups and shards, updated after the run. "
+        "Every shard must read the same file or shards will disagree on the split.",
+    )
+    parser.add_argument(
+        "--target-group-seconds",
+        type=float,
+        default=60,
+        help="with --durations: pack selections with known durations into groups of about this many seconds",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="run up to this many groups at once; each group's log is printed when it finishes",
+    )
+    parser.add_argument(
+        "--discovery-cache",
+        help="JSON file with the parsed `swift test list` output, reused while test sources and "
+        "Package.resolved are unchanged; tests are then built with `swift build --build-tests`",
+    )
+    parser.add_argument("--report", help="write per-group and per-selection results as JSON")
+    parser.add_argument("--junit", help="write per-selection results as JUnit XML")
+    parser.add_argument(
+        "--ledger",
+        help="JSON ledger of recent runs per selection, updated after the run; marks flaky and slow-trending ones",
+    )
     parser.add_argument("--list-only", action="store_true")
     parser.add_argument("--swift-command", default="swift")
     parser.add_argument("--swift-command-arg", action="append", default=[])
     return parser.parse_args()
 
 
-def run_command(command: list[str], timeout: int | None = None) -> int:
-    print(f"+ {' '.join(command)}", flush=True)
-    process = subprocess.Popen(command, start_new_session=True)
+def run_command(command: list[str], timeout: int | None = None, log: TextIO | None = None) -> int:
+    print(f"+ {' '.join(command)}", file=log, flush=True)
+    if log is None:
+        process = subprocess.Popen(command, start_new_session=True)
+    else:
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
     try:
         return process.wait(timeout=timeout)
     except subprocess.TimeoutExpired:
-        print(f"::warning::Command timed out after {timeout}s: {' '.join(command)}", flush=True)
+        print(f"::warning::Command timed out after {timeout}s: {' '.join(command)}", file=log, flush=True)
         os.killpg(process.pid, signal.SIGTERM)
         try:
             process.wait(timeout=10)
@@ -144,6 +267,138 @@ def swift_test_list(swift_command: list[str]) -> list[TestSelection]:
     return sorted(selections, key=lambda selection: selection.name)
 
 
+def discovery_fingerprint(swift_command: list[str]) -> str:
+    digest = hashlib.sha256(json.dumps([swift_command, sys.platform, platform.machine()]).encode())
+    # Read inputs from the package root whatever the working directory; hash them by relative path.
+    paths = list(DISCOVERY_INPUT_FILES)
+    for directory in DISCOVERY_INPUT_DIRECTORIES:
+        for root, directories, files in os.walk(os.path.join(PACKAGE_ROOT, directory)):
+            directories.sort()
+            relative = os.path.relpath(root, PACKAGE_ROOT)
+            paths.extend(os.path.join(relative, name) for name in sorted(files) if name.endswith(".swift"))
+    for path in paths:
+        digest.update(path.encode() + b"\0")
+        try:
+            with open(os.path.join(PACKAGE_ROOT, path), "rb") as source:
+                digest.update(hashlib.sha256(source.read()).digest())
+        except FileNotFoundError:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+def load_discovery_cache(path: str, fingerprint: str) -> list[TestSelection] | None:
+    try:
+        with open(path, encoding="utf-8") as cache:
+            data = json.load(cache)
+        if data["version"] != DISCOVERY_CACHE_VERSION or data["fingerprint"] != fingerprint:
+            return None
+        return [
+            TestSelection(item["name"], item["filterPattern"], item.get("suiteName"))
+            for item in data["selections"]
+        ]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        print(f"::warning::Ignoring unreadable discovery cache {path}: {error!r}", flush=True)
+        return None
+
+
+def write_json(path: str, data: object) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as output:
+        json.dump(data, output, indent=2)
+        output.write("\n")
+    os.replace(temporary_path, path)
+
+
+def save_discovery_cache(path: str, fingerprint: str, selections: list[TestSelection]) -> None:
+    data = {
+        "version": DISCOVERY_CACHE_VERSION,
+        "fingerprint": fingerprint,
+        "selections": [
+            {"name": selection.name, "filterPattern": selection.filter_pattern, "suiteName": selection.suite_name}
+            for selection in selections
+        ],
+    }
+    write_json(path, data)
+
+
+def discover_selections(args: argparse.Namespace, swift_command: list[str], stats: RunStats) -> list[TestSelection]:
+    if not args.discovery_cache:
+        return swift_test_list(swift_command)
+    fingerprint = discovery_fingerprint(swift_command)
+    selections = load_discovery_cache(args.discovery_cache, fingerprint)
+    if selections is None:
+        stats.discovery_cache = "miss"
+        selections = swift_test_list(swift_command)
+        save_discovery_cache(args.discovery_cache, fingerprint, selections)
+        return selections
+
+    stats.discovery_cache = "hit"
+    print(f"Reusing {len(selections)} test selections from {args.discovery_cache}", flush=True)
+    # `swift test list` also built the tests; the groups run with --skip-build and still need that.
+    if not args.list_only:
+        build_command = [*swift_command, "build", "--build-tests"]
+        build_result = run_command(build_command)
+        if build_result != 0:
+            raise subprocess.CalledProcessError(build_result, build_command)
+    return selections
+
+
+def load_durations(path: str | None) -> dict[str, float]:
+    if not path:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as history:
+            data = json.load(history)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as error:
+        print(f"::warning::Ignoring unreadable duration history {path}: {error}", flush=True)
+        return {}
+    if not isinstance(data, dict) or data.get("version") != DURATION_HISTORY_VERSION:
+        selections = None
+    else:
+        selections = data.get("selections")
+    if not isinstance(selections, dict):
+        print(f"::warning::Ignoring duration history {path} with unknown format", flush=True)
+        return {}
+    return {
+        name: float(seconds)
+        for name, seconds in selections.items()
+        if isinstance(seconds, (int, float)) and not isinstance(seconds, bool) and seconds >= 0
+    }
+
+
+def save_durations(path: str, durations: dict[str, float]) -> None:
+    selections = {name: round(seconds, 3) for name, seconds in sorted(durations.items())}
+    write_json(path, {"version": DURATION_HISTORY_VERSION, "selections": selections})
+
+
+def record_duration(durations: dict[str, float], suites: list[TestSelection], seconds: float) -> None:
+    # A group run only has one wall time; split it in proportion to what the history already expects.
+    known = [durations[suite.name] for suite in suites if suite.name in durations]
+    fallback = sum(known) / len(known) if known else 1.0
+    weights = [durations.get(suite.name, fallback) for suite in suites]
+    total = sum(weights)
+    for suite, weight in zip(suites, weights):
+        measured = seconds * weight / total if total > 0 else seconds / len(suites)
+        previous = durations.get(suite.name)
+        if previous is None:
+            durations[suite.name] = measured
+        else:
+            durations[suite.name] = previous + DURATION_SMOOTHING * (measured - previous)
+
+
+def predicted_seconds(group: list[TestSelection], durations: dict[str, float]) -> float | None:
+    if not all(suite.name in durations for suite in group):
+        return None
+    return sum(durations[suite.name] for suite in group)
+
+
 def append_github_summary(stats: RunStats) -> None:
     summary_path = os.environ.get("GITHUB_STEP_SUMMARY")
     if not summary_path:
@@ -153,10 +408,17 @@ def append_github_summary(stats: RunStats) -> None:
         summary.write("### macOS Swift test timing\n\n")
         summary.write("| Field | Value |\n")
         summary.write("| --- | --- |\n")
-        for field, value in stats.summary_rows():
+        for field_name, value in stats.summary_rows():
             safe_value = value.replace("|", "\\|")
-            summary.write(f"| {field} | `{safe_value}` |\n")
+            summary.write(f"| {field_name} | `{safe_value}` |\n")
         summary.write("\n")
+        if stats.shard_predictions and stats.shard_index is not None:
+            summary.write("| Shard | Predicted seconds | Actual seconds |\n")
+            summary.write("| --- | --- | --- |\n")
+            for index, predicted in enumerate(stats.shard_predictions):
+                actual = f"{stats.execution_seconds:.1f}" if index == stats.shard_index else "-"
+                summary.write(f"| {index + 1}/{len(stats.shard_predictions)} | `{predicted:.1f}` | `{actual}` |\n")
+            summary.write("\n")
 
 
 def print_timing_summary(stats: RunStats) -> None:
@@ -170,7 +432,68 @@ def chunks(items: list[TestSelection], size: int) -> Iterable[list[TestSelection
         yield items[index : index + size]
 
 
-def shard_groups(groups: list[list[TestSelection]], shard_index: int | None, shard_count: int | None) -> list[list[TestSelection]]:
+def pack_groups(
+    suites: list[TestSelection],
+    group_size: int,
+    durations: dict[str, float],
+    target_seconds: float,
+) -> list[list[TestSelection]]:
+    """Balance selections with a recorded duration longest-first; chunk the rest as before."""
+    known = [suite for suite in suites if suite.name in durations]
+    unknown = [suite for suite in suites if suite.name not in durations]
+    groups: list[list[TestSelection]] = []
+    if known:
+        total = sum(durations[suite.name] for suite in known)
+        count = min(len(known), max(math.ceil(total / target_seconds), math.ceil(len(known) / group_size)))
+        packed: list[list[TestSelection]] = [[] for _ in range(count)]
+        loads = [0.0] * count
+        for suite in sorted(known, key=lambda suite: (-durations[suite.name], suite.name)):
+            index = min(
+                (index for index in range(count) if len(packed[index]) < group_size),
+                key=lambda index: (loads[index], index),
+            )
+            packed[index].append(suite)
+            loads[index] += durations[suite.name]
+        # Zero-second selections add no load, so they can leave a group unused.
+        groups.extend(group for group in packed if group)
+    groups.extend(chunks(unknown, group_size))
+
+    # Keep discovery order (and so the prioritized suites first) within and across groups.
+    order = {suite.name: index for index, suite in enumerate(suites)}
+    for group in groups:
+        group.sort(key=lambda suite: order[suite.name])
+    return sorted(groups, key=lambda group: order[group[0].name])
+
+
+def plan_shards(
+    groups: list[list[TestSelection]],
+    shard_count: int,
+    durations: dict[str, float],
+) -> list[list[list[TestSelection]]]:
+    """Groups with a prediction go longest-first to the least loaded shard; the rest round-robin as before."""
+    shards: list[list[int]] = [[] for _ in range(shard_count)]
+    loads = [0.0] * shard_count
+    predictions = [predicted_seconds(group, durations) for group in groups]
+    estimated = sorted(
+        (index for index, predicted in enumerate(predictions) if predicted is not None),
+        key=lambda index: (-(predictions[index] or 0), index),
+    )
+    for index in estimated:
+        shard = min(range(shard_count), key=lambda shard: (loads[shard], shard))
+        shards[shard].append(index)
+        loads[shard] += predictions[index] or 0
+    unestimated = [index for index, predicted in enumerate(predictions) if predicted is None]
+    for position, index in enumerate(unestimated):
+        shards[position % shard_count].append(index)
+    return [[groups[index] for index in sorted(shard)] for shard in shards]
+
+
+def shard_groups(
+    groups: list[list[TestSelection]],
+    shard_index: int | None,
+    shard_count: int | None,
+    durations: dict[str, float] | None = None,
+) -> list[list[TestSelection]]:
     if shard_index is None and shard_count is None:
         return groups
     if shard_index is None or shard_count is None:
@@ -179,7 +502,7 @@ def shard_groups(groups: list[list[TestSelection]], shard_index: int | None, sha
         raise ValueError("--shard-count must be positive")
     if shard_index < 0 or shard_index >= shard_count:
         raise ValueError("--shard-index must be in the range [0, --shard-count)")
-    return [group for index, group in enumerate(groups) if index % shard_count == shard_index]
+    return plan_shards(groups, shard_count, durations or {})[shard_index]
 
 
 def prioritized_suites(suites: list[TestSelection]) -> list[TestSelection]:
@@ -206,29 +529,331 @@ def filter_for(suites: list[TestSelection]) -> str:
     return rf"({'|'.join(suite.filter_pattern for suite in suites)})"
 
 
-def run_group(suites: list[TestSelection], timeout: int, swift_command: list[str]) -> int:
-    return run_command(
-        [*swift_command, "test", "--skip-build", "--no-parallel", "--filter", filter_for(suites)],
-        timeout=timeout,
+def run_group(suites: list[TestSelection], runner: GroupRunner, kind: str = "group") -> int:
+    flags = ["--skip-build", "--no-parallel", *(["--ignore-lock"] if runner.ignore_lock else [])]
+    started = time.monotonic()
+    result = run_command(
+        [*runner.swift_command, "test", *flags, "--filter", filter_for(suites)],
+        timeout=runner.timeout,
+        log=runner.log,
     )
+    seconds = time.monotonic() - started
+    names = tuple(suite.name for suite in suites)
+    runner.attempts.append(GroupAttempt(runner.group_index, kind, names, seconds, result))
+    if runner.durations is not None and result == 0:
+        record_duration(runner.durations, suites, seconds)
+    return result
+
+
+def retry_failed_selection(
+    suite: TestSelection, result: int, runner: GroupRunner, stats: RunStats, retry_failures: bool
+) -> int:
+    """Rerun a selection that failed on its own once, so a flaky selection is recorded as passed_on_retry."""
+    if result in (0, 124) or not retry_failures:
+        return result
+    stats.isolated_selection_retries += 1
+    print(f"Selection {suite.name} failed with exit code {result}; retrying it once", file=runner.log, flush=True)
+    print(f"::group::Swift test retry {suite.name}", file=runner.log, flush=True)
+    retry_result = run_group([suite], runner, "isolated-retry")
+    print("::endgroup::", file=runner.log, flush=True)
+    return retry_result
 
 
 def retry_selections_individually(
-    suites: list[TestSelection],
-    timeout: int,
-    swift_command: list[str],
-    stats: RunStats,
+    suites: list[TestSelection], runner: GroupRunner, stats: RunStats, retry_failures: bool = False
 ) -> int:
     for suite in suites:
         stats.isolated_selection_retries += 1
-        print(f"::group::Swift test retry {suite.name}", flush=True)
-        retry_result = run_group([suite], timeout, swift_command)
-        print("::endgroup::", flush=True)
+        print(f"::group::Swift test retry {suite.name}", file=runner.log, flush=True)
+        retry_result = run_group([suite], runner, "isolated")
+        print("::endgroup::", file=runner.log, flush=True)
+        retry_result = retry_failed_selection(suite, retry_result, runner, stats, retry_failures)
         if retry_result != 0:
             return retry_result
     return 0
 
 
+def bisect_timed_out_selections(
+    suites: list[TestSelection], runner: GroupRunner, stats: RunStats, retry_failures: bool = False
+) -> int:
+    """Rerun halves of a timed-out group and recurse only into a half that times out again."""
+    middle = len(suites) // 2
+    for half in (suites[:middle], suites[middle:]):
+        stats.bisection_steps += 1
+        print(f"::group::Swift test bisect ({len(half)} of {len(suites)} selections)", file=runner.log, flush=True)
+        half_result = run_group(half, runner, "bisect")
+        print("::endgroup::", file=runner.log, flush=True)
+        if half_result == 124 and len(half) == 1:
+            stats.hung_selections.append(half[0].name)
+            print(f"::error::Swift test selection {half[0].name} timed out on its own", file=runner.log, flush=True)
+            return half_result
+        if half_result == 124:
+            half_result = bisect_timed_out_selections(half, runner, stats, retry_failures)
+        elif len(half) == 1:
+            half_result = retry_failed_selection(half[0], half_result, runner, stats, retry_failures)
+        if half_result != 0:
+            return half_result
+    # Neither half hangs alone: the timeout needs selections together, or was a one-off.
+    return 0
+
+
+def run_group_with_recovery(
+    group: list[TestSelection],
+    group_index: int,
+    group_count: int,
+    runner: GroupRunner,
+    stats: RunStats,
+    retry_non_timeout_failures: bool,
+    timeout_recovery: str = "individual",
+) -> int:
+    runner = replace(runner, group_index=group_index)
+    log = runner.log
+    print(f"::group::Swift test group {group_index}/{group_count} ({len(group)} selections)", file=log, flush=True)
+    group_result = run_group(group, runner)
+    print("::endgroup::", file=log, flush=True)
+    if group_result == 0:
+        stats.first_pass_successful_groups += 1
+        return 0
+
+    stats.first_pass_failed_groups += 1
+    group_timed_out = group_result == 124
+    if group_timed_out:
+        stats.timed_out_groups += 1
+
+    if group_result != 124:
+        if not retry_non_timeout_failures:
+            return group_result
+
+        stats.full_group_retries += 1
+        print(f"Group {group_index} failed with exit code {group_result}; retrying group once", file=log, flush=True)
+        retry_result = run_group(group, runner, "group-retry")
+        if retry_result == 0:
+            if len(group) > 1:
+                # A whole-group pass does not say which member flaked; run each one alone to find it.
+                print(f"Group {group_index} passed on retry; running selections one at a time", file=log, flush=True)
+                isolated_result = retry_selections_individually(group, runner, stats, retry_non_timeout_failures)
+                if isolated_result != 0:
+                    return isolated_result
+            stats.recovered_groups += 1
+            return 0
+        if retry_result != 124:
+            return retry_result
+        group_timed_out = True
+        stats.timed_out_groups += 1
+    if len(group) == 1:
+        return 124
+
+    if timeout_recovery == "bisect":
+        print(f"Group {group_index} timed out; bisecting selections", file=log, flush=True)
+        retry_result = bisect_timed_out_selections(group, runner, stats, retry_non_timeout_failures)
+    else:
+        print(f"Group {group_index} timed out; retrying selections one at a time", file=log, flush=True)
+        retry_result = retry_selections_individually(group, runner, stats, retry_non_timeout_failures)
+    if retry_result != 0:
+        return retry_result
+    if group_timed_out:
+        stats.recovered_groups += 1
+    return 0
+
+
+def run_groups_concurrently(
+    groups: list[list[TestSelection]],
+    workers: int,
+    runner: GroupRunner,
+    stats: RunStats,
+    retry_non_timeout_failures: bool,
+    timeout_recovery: str = "individual",
+) -> int:
+    """Run groups on a worker pool; once one fails, groups that have not started are skipped."""
+    output_lock = threading.Lock()
+    failed = threading.Event()
+    results: dict[int, int] = {}
+
+    def run(group_index: int, group: list[TestSelection]) -> None:
+        if failed.is_set():
+            return
+        group_stats = RunStats()
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as log:
+            result = run_group_with_recovery(
+                group,
+                group_index,
+                len(groups),
+                replace(runner, log=log),
+                group_stats,
+                retry_non_timeout_failures,
+                timeout_recovery,
+            )
+            log.seek(0)
+            with output_lock:
+                # One group's output at a time, so the ::group:: sections do not interleave.
+                sys.stdout.flush()
+                shutil.copyfileobj(log, sys.stdout)
+                sys.stdout.flush()
+                stats.add_group_counts(group_stats)
+                results[group_index] = result
+        if result != 0:
+            failed.set()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(run, index, group) for index, group in enumerate(groups, start=1)]:
+            future.result()
+    failures = [results[index] for index in sorted(results) if results[index] != 0]
+    return failures[0] if failures else 0
+
+
+def selection_outcomes(
+    groups: list[list[TestSelection]],
+    skipped: list[TestSelection],
+    attempts: list[GroupAttempt],
+    hung_selections: list[str],
+) -> list[dict[str, Any]]:
+    """Per selection: its outcome and its share of the first passing run's wall time.
+
+    A failing group run says nothing about which member broke it, so failed, timed_out and
+    passed_on_retry need a run of the selection on its own (an isolated retry or a bisected
+    single) or the bisect culprit. Members only seen in failing group runs are indeterminate.
+    """
+    outcomes = [
+        {"name": suite.name, "group": None, "outcome": "skipped", "attempts": 0, "estimatedSeconds": None}
+        for suite in skipped
+    ]
+    for group_index, group in enumerate(groups, start=1):
+        for suite in group:
+            runs = [attempt for attempt in attempts if suite.name in attempt.selections]
+            passing = next((attempt for attempt in runs if attempt.exit_code == 0), None)
+            alone = [index for index, attempt in enumerate(runs) if len(attempt.selections) == 1]
+            failed_alone = [index for index in alone if runs[index].exit_code != 0]
+            if not runs:
+                outcome = "not_run"
+            elif suite.name in hung_selections:
+                outcome = "timed_out"
+            elif failed_alone and any(attempt.exit_code == 0 for attempt in runs[failed_alone[0] + 1 :]):
+                outcome = "passed_on_retry"
+            elif failed_alone:
+                outcome = "timed_out" if runs[failed_alone[-1]].exit_code == 124 else "failed"
+            elif passing is not None:
+                outcome = "passed"
+            else:
+                outcome = "indeterminate"
+            outcomes.append(
+                {
+                    "name": suite.name,
+                    "group": group_index,
+                    "outcome": outcome,
+                    "attempts": len(runs),
+                    "estimatedSeconds": round(passing.seconds / len(passing.selections), 3) if passing else None,
+                }
+            )
+    return outcomes
+
+
+def write_report(
+    path: str,
+    stats: RunStats,
+    exit_code: int,
+    groups: list[list[TestSelection]],
+    attempts: list[GroupAttempt],
+    outcomes: list[dict[str, Any]],
+) -> None:
+    report = {
+        "version": REPORT_VERSION,
+        "exitCode": exit_code,
+        "summary": dict(stats.summary_rows()),
+        "groups": [
+            {
+                "index": group_index,
+                "selections": [suite.name for suite in group],
+                "attempts": [
+                    {
+                        "kind": attempt.kind,
+                        "selections": list(attempt.selections),
+                        "seconds": round(attempt.seconds, 3),
+                        "exitCode": attempt.exit_code,
+                        "timedOut": attempt.exit_code == 124,
+                    }
+                    for attempt in attempts
+                    if attempt.group_index == group_index
+                ],
+            }
+            for group_index, group in enumerate(groups, start=1)
+        ],
+        "selections": outcomes,
+    }
+    write_json(path, report)
+
+
+def write_junit(path: str, stats: RunStats, outcomes: list[dict[str, Any]]) -> None:
+    shard = dict(stats.summary_rows())["Shard"]
+    failures = [item for item in outcomes if item["outcome"] in ("failed", "timed_out")]
+    skipped = [item for item in outcomes if item["outcome"] in ("skipped", "not_run", "indeterminate")]
+    suites = ElementTree.Element("testsuites")
+    suite = ElementTree.SubElement(
+        suites,
+        "testsuite",
+        name=f"CodexBar Swift tests (shard {shard})",
+        tests=str(len(outcomes)),
+        failures=str(len(failures)),
+        skipped=str(len(skipped)),
+        time=f"{stats.execution_seconds:.3f}",
+    )
+    for item in outcomes:
+        module, _, name = item["name"].partition(".")
+        case = ElementTree.SubElement(
+            suite, "testcase", classname=module, name=name or item["name"], time=f"{item['estimatedSeconds'] or 0:.3f}"
+        )
+        if item["outcome"] == "timed_out":
+            ElementTree.SubElement(case, "failure", message=f"timed out after {item['attempts']} attempts")
+        elif item["outcome"] == "failed":
+            ElementTree.SubElement(case, "failure", message=f"failed after {item['attempts']} attempts")
+        elif item["outcome"] in ("skipped", "not_run", "indeterminate"):
+            ElementTree.SubElement(case, "skipped", message=item["outcome"].replace("_", " "))
+        elif item["outcome"] == "passed_on_retry":
+            ElementTree.SubElement(case, "system-out").text = "Passed on retry."
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    ElementTree.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def slow_trending(seconds: list[float]) -> bool:
+    recent, earlier = seconds[-SLOW_TREND_RECENT_RUNS:], seconds[:-SLOW_TREND_RECENT_RUNS]
+    if len(earlier) < SLOW_TREND_RECENT_RUNS:
+        return False
+    recent_mean = sum(recent) / len(recent)
+    earlier_mean = sum(earlier) / len(earlier)
+    return recent_mean >= earlier_mean * SLOW_TREND_RATIO and recent_mean - earlier_mean >= SLOW_TREND_MIN_SECONDS
+
+
+def update_ledger(path: str, outcomes: list[dict[str, Any]], stats: RunStats) -> None:
+    """Append this run to each selection's rolling history and re-judge it as flaky or slow-trending."""
+    try:
+        with open(path, encoding="utf-8") as ledger_file:
+            ledger = json.load(ledger_file)
+        if ledger.get("version") != LEDGER_VERSION or not isinstance(ledger.get("selections"), dict):
+            raise ValueError("unknown format")
+    except FileNotFoundError:
+        ledger = {"version": LEDGER_VERSION, "selections": {}}
+    except (OSError, ValueError, AttributeError) as error:
+        print(f"::warning::Starting a new test ledger; could not read {path}: {error}", flush=True)
+        ledger = {"version": LEDGER_VERSION, "selections": {}}
+
+    for item in outcomes:
+        if item["outcome"] in ("not_run", "indeterminate"):
+            continue
+        entry = ledger["selections"].setdefault(item["name"], {"history": []})
+        run = {"outcome": item["outcome"], "seconds": item["estimatedSeconds"]}
+        entry["history"] = [*entry.get("history", []), run][-LEDGER_WINDOW:]
+        history = entry["history"]
+        entry["flaky"] = sum(run["outcome"] == "passed_on_retry" for run in history) >= FLAKY_MIN_RETRY_PASSES
+        entry["slowTrending"] = slow_trending([run["seconds"] for run in history if run["seconds"] is not None])
+    write_json(path, ledger)
+
+    # Report only this shard's selections; the ledger also holds the other shards'.
+    names = sorted(item["name"] for item in outcomes if item["name"] in ledger["selections"])
+    stats.flaky_selections = [name for name in names if ledger["selections"][name]["flaky"]]
+    stats.slow_trending_selections = [name for name in names if ledger["selections"][name]["slowTrending"]]
+
+
 def main() -> int:
     total_started = time.monotonic()
     args = parse_args()
@@ -236,24 +861,39 @@ def main() -> int:
         group_size=args.group_size,
         shard_index=args.shard_index,
         shard_count=args.shard_count,
+        workers=args.workers,
     )
     if args.group_size < 1:
         print("--group-size must be positive", file=sys.stderr)
         return 2
+    if args.workers < 1:
+        print("--workers must be positive", file=sys.stderr)
+        return 2
+    if args.target_group_seconds <= 0:
+        print("--target-group-seconds must be positive", file=sys.stderr)
+        return 2
+    durations = load_durations(args.durations)
+    recorded = dict(durations) if args.durations else None
 
     swift_command = [args.swift_command, *args.swift_command_arg]
     result = 0
+    suite_groups: list[list[TestSelection]] = []
+    skipped: list[TestSelection] = []
+    runner = GroupRunner(args.timeout, swift_command, recorded, ignore_lock=args.workers > 1)
     try:
         discovery_started = time.monotonic()
         try:
-            suites = prioritized_suites(filtered_suites_for_environment(swift_test_list(swift_command)))
+            discovered = discover_selections(args, swift_command, stats)
+            suites = prioritized_suites(filtered_suites_for_environment(discovered))
+            kept = set(suites)
+            skipped = [suite for suite in discovered if suite not in kept]
         finally:
             stats.discovery_seconds = time.monotonic() - discovery_started
         stats.discovered_selections = len(suites)
 
-        suite_groups = list(chunks(suites, args.group_size))
+        all_groups = pack_groups(suites, args.group_size, durations, args.target_group_seconds)
         try:
-            suite_groups = shard_groups(suite_groups, args.shard_index, args.shard_count)
+            suite_groups = shard_groups(all_groups, args.shard_index, args.shard_count, durations)
         except ValueError as error:
             print(str(error), file=sys.stderr)
             result = 2
@@ -262,6 +902,13 @@ def main() -> int:
             suite_groups = suite_groups[: args.limit_groups]
         stats.selected_selections = sum(len(group) for group in suite_groups)
         stats.selected_groups = len(suite_groups)
+        stats.known_duration_selections = sum(suite.name in durations for group in suite_groups for suite in group)
+        stats.predicted_seconds = sum(predicted_seconds(group, durations) or 0 for group in suite_groups)
+        if durations and args.shard_count is not None:
+            stats.shard_predictions = [
+                sum(predicted_seconds(group, durations) or 0 for group in shard)
+                for shard in plan_shards(all_groups, args.shard_count, durations)
+            ]
 
         shard_suffix = ""
         if args.shard_index is not None and args.shard_count is not None:
@@ -282,50 +929,23 @@ def main() -> int:
             return 0
 
         execution_started = time.monotonic()
+        if args.workers > 1:
+            result = run_groups_concurrently(
+                suite_groups, args.workers, runner, stats, args.retry_non_timeout_failures, args.timeout_recovery
+            )
+            return result
         for group_index, group in enumerate(suite_groups, start=1):
-            print(
-                f"::group::Swift test group {group_index}/{len(suite_groups)} "
-                f"({len(group)} selections)",
-                flush=True,
+            result = run_group_with_recovery(
+                group,
+                group_index,
+                len(suite_groups),
+                runner,
+                stats,
+                args.retry_non_timeout_failures,
+                args.timeout_recovery,
             )
-            group_result = run_group(group, args.timeout, swift_command)
-            print("::endgroup::", flush=True)
-            if group_result == 0:
-                stats.first_pass_successful_groups += 1
-                continue
-
-            stats.first_pass_failed_groups += 1
-            group_timed_out = group_result == 124
-            if group_timed_out:
-                stats.timed_out_groups += 1
-            if len(group) == 1:
-                result = group_result
-                return result
-
-            if group_result != 124:
-                if not args.retry_non_timeout_failures:
-                    result = group_result
-                    return result
-
-                stats.full_group_retries += 1
-                print(f"Group {group_index} failed with exit code {group_result}; retrying group once", flush=True)
-                retry_result = run_group(group, args.timeout, swift_command)
-                if retry_result == 0:
-                    stats.recovered_groups += 1
-                    continue
-                if retry_result != 124:
-                    result = retry_result
-                    return result
-                group_timed_out = True
-                stats.timed_out_groups += 1
-
-            print(f"Group {group_index} timed out; retrying selections one at a time", flush=True)
-            retry_result = retry_selections_individually(group, args.timeout, swift_command, stats)
-            if retry_result != 0:
-                result = retry_result
+            if result != 0:
                 return result
-            if group_timed_out:
-                stats.recovered_groups += 1
 
         return result
     finally:
@@ -333,6 +953,16 @@ def main() -> int:
         if "execution_started" in locals():
             stats.execution_seconds = time.monotonic() - execution_started
         if not args.list_only:
+            if args.durations and recorded is not None and recorded != durations:
+                save_durations(args.durations, recorded)
+            if "execution_started" in locals() and (args.report or args.junit or args.ledger):
+                outcomes = selection_outcomes(suite_groups, skipped, runner.attempts, stats.hung_selections)
+                if args.ledger:
+                    update_ledger(args.ledger, outcomes, stats)
+                if args.report:
+                    write_report(args.report, stats, result, suite_groups, runner.attempts, outcomes)
+                if args.junit:
+                    write_junit(args.junit, stats, outcomes)
             print_timing_summary(stats)
             append_github_summary(stats)
 
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+codexbar-skill-bench — sanitizer and startup benchmark for the codexbar agent skill bridge
+
+Generates a synthetic multi-account `usage --all` payload (identity fields,
+nested rate windows, status prose, error messages that quote bearer tokens,
+JWTs, labeled secrets and emails) and measures:
+
+  - text: sanitize_text() over every string in the payload;
+  - tree: sanitize() over the decoded payload;
+  - stream: stream_json() over the encoded payload, i.e. decode, sanitize and
+    render as `usage` does for CLI stdout.
+
+Each phase reports the best of --repeat runs as seconds and MB/s of JSON input.
+
+Startup runs the bridge as agents do, against a stub CLI that answers
+instantly, and reports the median wall time of `--help`, `doctor` and `usage`:
+cold without CODEXBAR_CACHE_TTL (every run scans for the binary), warm with it
+set and the binary resolution record kept. Cached reads are removed before each
+warm run so `usage` still spawns the stub. The stub keeps CLI cost out of the
+numbers; serve discovery is off.
+
+Usage:
+  codexbar-skill-bench.py                      # 2000 provider entries, 20 startup runs per command
+  codexbar-skill-bench.py --entries 20000      # larger payload
+  codexbar-skill-bench.py --startup-runs 0     # sanitizer only
+  codexbar-skill-bench.py --json bench.json    # also record results for comparison between versions
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BRIDGE = Path(__file__).resolve().parent.parent / ".agents" / "skills" / "codexbar" / "scripts" / "codexbar"
+RESULTS_VERSION = 1
+PROVIDERS = ["codex", "claude", "cursor", "gemini", "zai", "copilot", "factory", "kimi"]
+PROSE = [
+    "Usage refreshed from the dashboard.",
+    "Weekly window resets on Monday.",
+    "Rate limited; retrying with backoff.",
+    "Credits remaining for this billing period.",
+    "Fetched via OAuth at 2026-10-17T08:00:00Z.",
+]
+
+
+def random_secret(rng, length=32):
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_"
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def status_text(rng):
+    """Mostly harmless prose; some lines quote credentials the way upstream errors do."""
+    roll = rng.random()
+    if roll < 0.70:
+        return rng.choice(PROSE)
+    if roll < 0.78:
+        return f"401 from API: Authorization: Bearer {random_secret(rng)}"
+    if roll < 0.84:
+        return f"token eyJ{random_secret(rng, 12)}.{random_secret(rng, 24)}.{random_secret(rng, 16)} expired"
+    if roll < 0.90:
+        return f"request failed; api_key={random_secret(rng)}; session=abc{random_secret(rng, 8)}"
+    if roll < 0.95:
+        return f"Signed in as user{rng.randint(1, 999)}@example.com"
+    return f"password {random_secret(rng, 12)} rejected"
+
+
+def window(rng):
+    return {
+        "usedPercent": round(rng.random() * 100, 1),
+        "windowMinutes": rng.choice([300, 10080]),
+        "resetsAt": f"2026-10-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z",
+        "resetDescription": rng.choice(PROSE),
+    }
+
+
+def entry(rng, index):
+    provider = PROVIDERS[index % len(PROVIDERS)]
+    return {
+        "provider": provider,
+        "source": rng.choice(["oauth", "web", "cli", "api"]),
+        "status": {"indicator": "none", "description": status_text(rng)},
+        "usage": {
+            "accountEmail": f"user{index}@example.com",
+            "accountOrganization": f"Org {index % 17}",
+            "identity": {"providerID": provider, "accountID": f"acct-{index}", "loginMethod": "oauth"},
+            "primary": window(rng),
+            "secondary": window(rng),
+            "tertiary": None,
+            "updatedAt": "2026-10-17T08:00:00Z",
+            "notes": [status_text(rng) for _ in range(3)],
+        },
+        "credits": {"remaining": rng.randint(0, 5000), "events": [{"amount": rng.randint(1, 50)} for _ in range(4)]},
+    }
+
+
+def strings(value):
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, str):
+            yield value
+
+
+class Pipe(io.BytesIO):
+    """stream_json() closes its pipe; keep the bytes for the next repeat."""
+
+    def close(self):
+        pass
+
+
+STUB_CLI = """#!/bin/sh
+case "$1" in
+  --version) echo "CodexBar 0.0.0-bench" ;;
+  config) echo "[]" ;;
+  *) echo '[{"provider": "codex", "usage": {"accountEmail": "a@example.com", "primary": {"usedPercent": 1}}}]' ;;
+esac
+"""
+STARTUP_COMMANDS = {"help": ["--help"], "doctor": ["doctor"], "usage": ["usage"]}
+
+
+def startup(runs):
+    """Median milliseconds per command, without and with the binary resolution record."""
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = Path(tmp) / "codexbar"
+        stub.write_text(STUB_CLI)
+        stub.chmod(0o755)
+        cache = Path(tmp) / "cache"
+        env = {
+            **os.environ,
+            "CODEXBAR_BIN": str(stub),
+            "CODEXBAR_CACHE_DIR": str(cache),
+            "CODEXBAR_SERVE_URL": "off",
+        }
+        env.pop("CODEXBAR_CACHE_TTL", None)
+        env.pop("CODEXBAR_SKIP_DISCOVERY", None)
+        results = {}
+        for name, argv in STARTUP_COMMANDS.items():
+            results[name] = {}
+            for mode in ("cold", "warm"):
+                mode_env = {**env, "CODEXBAR_CACHE_TTL": "60"} if mode == "warm" else env
+                times = []
+                for _ in range(runs):
+                    for entry in cache.glob("*.json") if cache.exists() else []:
+                        if entry.name != "binary.json":
+                            entry.unlink()
+                    started = time.perf_counter()
+                    subprocess.run([sys.executable, str(BRIDGE), *argv], env=mode_env, capture_output=True, check=True)
+                    times.append(time.perf_counter() - started)
+                results[name][f"{mode}_ms"] = round(statistics.median(times) * 1000, 1)
+        return results
+
+
+def best(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2000, help="provider entries in the payload")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per phase; the best is reported")
+    parser.add_argument("--startup-runs", type=int, default=20, help="bridge runs per command and mode; 0 skips")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    bridge = runpy.run_path(str(BRIDGE), run_name="codexbar_skill")
+    rng = random.Random(args.seed)
+    payload = [entry(rng, index) for index in range(args.entries)]
+    encoded = json.dumps(payload).encode()
+    texts = list(strings(payload))
+    megabytes = len(encoded) / 1e6
+    print(f"payload: {args.entries} entries, {len(texts)} strings, {megabytes:.1f} MB JSON")
+
+    phases = {
+        "text": lambda: [bridge["sanitize_text"](text, False) for text in texts],
+        "tree": lambda: bridge["sanitize"](payload, False),
+    }
+    if "stream_json" in bridge:
+
+        def stream():
+            target = bridge["JsonStream"](False)
+            pipe = Pipe(encoded)
+            bridge["stream_json"](pipe, target)
+            target.output.close()
+
+        phases["stream"] = stream
+
+    results = {}
+    for name, fn in phases.items():
+        seconds = best(args.repeat, fn)
+        results[name] = {"seconds": round(seconds, 4), "mb_per_s": round(megabytes / seconds, 2)}
+        print(f"{name:>7}: {seconds:8.3f}s  {megabytes / seconds:8.2f} MB/s")
+
+    startup_results = startup(args.startup_runs) if args.startup_runs > 0 else {}
+    for name, timing in startup_results.items():
+        print(f"{name:>7}: cold {timing['cold_ms']:7.1f}ms  warm {timing['warm_ms']:7.1f}ms")
+
+    if args.json:
+        record = {
+            "version": RESULTS_VERSION,
+            "python": platform.python_version(),
+            "entries": args.entries,
+            "bytes": len(encoded),
+            "phases": results,
+            "startup": startup_results,
+        }
+        Path(args.json).write_text(json.dumps(record, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
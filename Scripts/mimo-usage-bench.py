@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+mimo-usage-bench — parse and scan benchmark for Scripts/mimo-usage.py
+
+Generates a synthetic Claude-style session tree (user turns, large tool
+results, assistant rows with usage, copied and re-streamed requestIds, legacy
+session/message identities, malformed lines) and measures:
+
+  - parse: how fast parse_session_usage() reads it, with and without the
+    byte-level usage prefilter and with each available JSON decoder;
+  - scan: aggregate_usage() cold, warm (nothing changed), cold with --jobs, and
+    incremental after appending to a fraction of the files, each as a separate
+    `mimo-usage --json --timings` run so its peak RSS is its own.
+
+Every parse mode must extract identical rows, and every scan must report the
+same all-time totals as a plain-Python reference dedup over the full decode.
+
+Usage:
+  mimo-usage-bench.py                       # 2 GB corpus in a temp dir
+  mimo-usage-bench.py --size-mb 256         # smaller corpus
+  mimo-usage-bench.py --corpus DIR --keep   # generate into DIR and keep it for reruns
+  mimo-usage-bench.py --json bench.json     # also record results for comparison between versions
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).with_name("mimo-usage.py")
+RESULTS_VERSION = 1
+# Rows kept around for duplicate requestIds (copied sessions, re-streamed messages).
+DUPLICATE_POOL = 2000
+
+
+def load_mimo_usage():
+    spec = importlib.util.spec_from_file_location("mimo_usage", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def projects_dir(root: Path) -> Path:
+    """Where the corpus keeps its session files; `root` doubles as MIMO_CLAUDE_HOME."""
+    return root / ".claude" / "projects"
+
+
+def random_timestamp(rng):
+    return f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.000Z"
+
+
+def assistant_line(rng, session_id, index, legacy):
+    row = {
+        "type": "assistant",
+        "timestamp": random_timestamp(rng),
+        "sessionId": session_id,
+        "requestId": f"req_{session_id}_{index}",
+        "message": {
+            "id": f"msg_{session_id}_{index}",
+            "role": "assistant",
+            "content": [{"type": "text", "text": "ok " * rng.randint(10, 200)}],
+            "usage": {
+                "input_tokens": rng.randint(1, 4000),
+                "output_tokens": rng.randint(1, 2000),
+                "cache_read_input_tokens": rng.randint(0, 50000),
+                "cache_creation_input_tokens": rng.randint(0, 5000),
+            },
+        },
+    }
+    if legacy:
+        del row["requestId"]
+    return row
+
+
+def duplicate_line(rng, pool):
+    """Re-emit an earlier usage row: verbatim (copied session) or later with more output (re-streamed)."""
+    row = json.loads(rng.choice(pool))
+    if rng.random() < 0.5:
+        usage = row["message"]["usage"]
+        usage["output_tokens"] += rng.randint(1, 500)
+        row["timestamp"] = row["timestamp"].replace(":00.000Z", ":30.000Z")
+    return row
+
+
+def malformed_line(rng, line):
+    """A damaged usage line: cut mid-object, or a usage payload with unusable token counts."""
+    if rng.random() < 0.5:
+        return line[: rng.randint(1, len(line) - 1)]
+    row = json.loads(line)
+    row["message"]["usage"] = {"input_tokens": "many", "output_tokens": 1}
+    return json.dumps(row)
+
+
+def session_line(rng, session_id, index, options, pool):
+    """One JSONL line: an assistant row with usage, a user turn, or a large tool result."""
+    roll = rng.random()
+    if roll < options.usage_ratio:
+        kind = rng.random()
+        if pool and kind < options.duplicate_ratio:
+            return json.dumps(duplicate_line(rng, pool))
+        line = json.dumps(assistant_line(rng, session_id, index, rng.random() < options.legacy_ratio))
+        if rng.random() < options.malformed_ratio:
+            return malformed_line(rng, line)
+        if len(pool) < DUPLICATE_POOL:
+            pool.append(line)
+        else:
+            pool[rng.randrange(DUPLICATE_POOL)] = line
+        return line
+    if roll < options.usage_ratio + (1 - options.usage_ratio) / 2:
+        return json.dumps(
+            {
+                "type": "user",
+                "timestamp": random_timestamp(rng),
+                "sessionId": session_id,
+                "message": {"role": "user", "content": "please " * rng.randint(5, 400)},
+            }
+        )
+    return json.dumps(
+        {
+            "type": "user",
+            "timestamp": random_timestamp(rng),
+            "sessionId": session_id,
+            "toolUseResult": {"stdout": "log line output\n" * rng.randint(50, 2000), "stderr": ""},
+            "message": {"role": "user", "content": [{"type": "tool_result", "content": "x" * rng.randint(100, 30000)}]},
+        }
+    )
+
+
+def write_lines(path: Path, rng, session_id, first_index, target_bytes, options, pool):
+    """Append lines to `path` until about `target_bytes` were written; return the next line index."""
+    written = 0
+    index = first_index
+    with path.open("a", encoding="utf-8") as f:
+        while written < target_bytes:
+            line = session_line(rng, session_id, index, options, pool) + "\n"
+            f.write(line)
+            written += len(line)
+            index += 1
+    return index
+
+
+def generate_corpus(root: Path, options):
+    """Write `options.files` session files totalling about `options.size_mb` megabytes; return their paths."""
+    rng = random.Random(options.seed)
+    pool = []
+    target = options.size_mb * 1_000_000 // options.files
+    paths = []
+    for file_index in range(options.files):
+        path = projects_dir(root) / f"project-{file_index % 8}" / f"session-{file_index}.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_lines(path, rng, f"s{file_index}", 0, target, options, pool)
+        paths.append(path)
+    return paths
+
+
+def append_sessions(paths, options):
+    """Grow `options.append_ratio` of the files by about 1% of their size; return {path: original size}."""
+    rng = random.Random(options.seed + 1)
+    pool = []
+    chosen = rng.sample(paths, max(1, round(len(paths) * options.append_ratio)))
+    sizes = {}
+    for path in chosen:
+        sizes[path] = path.stat().st_size
+        write_lines(path, rng, f"{path.stem}-append", 10**9, max(1, sizes[path] // 100), options, pool)
+    return sizes
+
+
+def measure(module, paths, prefilter):
+    """Parse every file once; return (seconds, bytes, rows)."""
+    started = time.perf_counter()
+    total_bytes = 0
+    rows = []
+    for path in paths:
+        parsed, offset = module.parse_session_usage(path, 0, prefilter=prefilter)
+        total_bytes += offset
+        rows.extend((str(path), *row) for row in parsed)
+    return time.perf_counter() - started, total_bytes, rows
+
+
+def reference_totals(module, paths, rows):
+    """All-time totals by a plain-dict dedup: the latest (timestamp, file, line) wins per identity."""
+    order = {str(path): index for index, path in enumerate(sorted(paths))}
+    winners = {}
+    for path, line_offset, identity, ts_str, usage in rows:
+        ts_us = module.timestamp_us(ts_str)
+        tokens = module.token_counts(usage)
+        if ts_us is None or tokens is None:
+            continue
+        key = identity if identity is not None else (path, line_offset)
+        rank = (ts_us, order[path], line_offset)
+        if key not in winners or rank >= winners[key][0]:
+            winners[key] = (rank, tokens)
+    sums = [sum(tokens[i] for _, tokens in winners.values()) for i in range(4)]
+    return {
+        "input": sums[0],
+        "output": sums[1],
+        "cache_read": sums[2],
+        "cache_create": sums[3],
+        "messages": len(winners),
+    }
+
+
+# Runs the scanner from a small interpreter and reports its peak RSS: a child's
+# ru_maxrss starts at its parent's footprint, which for this script is the corpus.
+RSS_PROBE = """
+import resource, subprocess, sys
+code = subprocess.call(sys.argv[1:])
+print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss, file=sys.stderr)
+sys.exit(code)
+"""
+
+
+def scan(root: Path, state: Path, jobs: int):
+    """Run `mimo-usage --json --timings` against the corpus and return its measurements.
+
+    Each scan is a fresh interpreter, as in real use (and so --jobs workers can be
+    spawned on macOS); peak RSS is the largest of the scanner and its workers.
+    """
+    env = dict(
+        os.environ,
+        MIMO_CLAUDE_HOME=str(root),
+        MIMO_USAGE_STATE_PATH=str(state),
+        MIMO_LOCAL_USAGE_PATH=str(state.with_suffix(".json")),
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", RSS_PROBE, sys.executable, str(SCRIPT), "--json", "--timings", "--jobs", str(jobs)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"mimo-usage exited {completed.returncode}: {completed.stderr.strip()}")
+    *_, stats_line, peak_line = completed.stderr.splitlines()
+    stats = json.loads(stats_line)
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    peak = int(peak_line) * (1 if sys.platform == "darwin" else 1024)
+    seconds = stats["scan_seconds"] + stats["totals_seconds"]
+    all_time = json.loads(completed.stdout)["windows"]["all_time"]
+    return {
+        "seconds": seconds,
+        "files": stats["files"],
+        "parsed_files": stats["parsed_files"],
+        "parsed_bytes": stats["parsed_bytes"],
+        "jobs": stats["jobs"],
+        "mb_per_s": stats["parsed_bytes"] / 1_000_000 / seconds if seconds > 0 else 0,
+        "peak_rss_bytes": peak,
+        "state_bytes": state.stat().st_size,
+        "all_time": {key: all_time[key] for key in ("input", "output", "cache_read", "cache_create", "messages")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--usage-ratio", type=float, default=0.15, help="share of lines that are usage rows")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="share of usage rows reusing a requestId")
+    parser.add_argument("--legacy-ratio", type=float, default=0.05, help="share of usage rows without a requestId")
+    parser.add_argument("--malformed-ratio", type=float, default=0.01, help="share of usage rows that are damaged")
+    parser.add_argument("--append-ratio", type=float, default=0.1, help="share of files grown for the incremental scan")
+    parser.add_argument("--jobs", type=int, default=4, help="workers for the parallel cold scan")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--corpus", type=Path, help="corpus directory (reused when it already has sessions)")
+    parser.add_argument("--keep", action="store_true", help="keep a generated temp corpus")
+    parser.add_argument("--json", type=Path, help="write the measurements to this file")
+    args = parser.parse_args()
+
+    module = load_mimo_usage()
+    root = args.corpus or Path(tempfile.mkdtemp(prefix="mimo-usage-bench-"))
+    sessions = projects_dir(root)
+    paths = sorted(sessions.rglob("*.jsonl")) if sessions.exists() else []
+    work = Path(tempfile.mkdtemp(prefix="mimo-usage-bench-state-"))
+    results = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "decoder": module.json_loads.__module__,
+        "options": {
+            key: getattr(args, key)
+            for key in (
+                "size_mb",
+                "files",
+                "usage_ratio",
+                "duplicate_ratio",
+                "legacy_ratio",
+                "malformed_ratio",
+                "append_ratio",
+                "jobs",
+                "seed",
+            )
+        },
+        "parse": [],
+        "scan": {},
+    }
+    try:
+        if not paths:
+            started = time.perf_counter()
+            paths = generate_corpus(root, args)
+            print(f"generated {len(paths)} files under {root} in {time.perf_counter() - started:.1f}s", flush=True)
+        corpus_bytes = sum(path.stat().st_size for path in paths)
+        results["corpus"] = {"files": len(paths), "bytes": corpus_bytes}
+
+        decoders = [("json", json.loads)]
+        if module.json_loads is not json.loads:
+            decoders.append((module.json_loads.__module__, module.json_loads))
+        default_loads = module.json_loads
+        baseline = None
+        reference = None
+        for prefilter in (False, True):
+            for name, loads in decoders:
+                module.json_loads = loads
+                seconds, total_bytes, rows = measure(module, paths, prefilter)
+                if reference is None:
+                    reference = rows
+                elif rows != reference:
+                    print(f"rows differ with prefilter={prefilter} decoder={name}", file=sys.stderr)
+                    return 1
+                rate = total_bytes / 1_000_000 / seconds
+                baseline = baseline or rate
+                mode = "prefilter" if prefilter else "full decode"
+                results["parse"].append(
+                    {"mode": mode, "decoder": name, "seconds": seconds, "bytes": total_bytes, "mb_per_s": rate, "rows": len(rows)}
+                )
+                print(
+                    f"{mode:>11} {name:>6}: {total_bytes / 1_000_000:8.1f} MB in {seconds:6.2f}s "
+                    f"= {rate:7.1f} MB/s ({rate / baseline:.2f}x), {len(rows)} rows",
+                    flush=True,
+                )
+        module.json_loads = default_loads
+        expected = reference_totals(module, paths, reference)
+
+        state = work / "serial.sqlite3"
+        phases = [
+            ("cold", lambda: scan(root, state, 1)),
+            ("warm", lambda: scan(root, state, 1)),
+            ("cold_jobs", lambda: scan(root, work / "parallel.sqlite3", args.jobs)),
+        ]
+        for label, run in phases:
+            results["scan"][label] = run()
+        # The appends are truncated away afterwards so a kept corpus stays reusable.
+        original_sizes = append_sessions(paths, args)
+        try:
+            results["corpus"]["appended_bytes"] = sum(path.stat().st_size - size for path, size in original_sizes.items())
+            results["scan"]["incremental"] = scan(root, state, 1)
+            results["scan"]["rescan"] = scan(root, work / "rescan.sqlite3", 1)
+            expected_after = reference_totals(module, paths, measure(module, paths, True)[2])
+        finally:
+            for path, size in original_sizes.items():
+                os.truncate(path, size)
+
+        for label, result in results["scan"].items():
+            print(
+                f"{label:>11} scan: {result['parsed_files']:>4}/{result['files']} files, "
+                f"{result['parsed_bytes'] / 1_000_000:8.1f} MB in {result['seconds']:6.2f}s "
+                f"= {result['mb_per_s']:7.1f} MB/s, peak RSS {result['peak_rss_bytes'] / 1_000_000:.0f} MB, "
+                f"state {result['state_bytes'] / 1_000_000:.1f} MB",
+                flush=True,
+            )
+        mismatched = [
+            label
+            for label, result in results["scan"].items()
+            if result["all_time"] != (expected_after if label in ("incremental", "rescan") else expected)
+        ]
+        results["dedup"] = {"reference": expected, "reference_after_append": expected_after, "mismatched": mismatched}
+        if args.json:
+            args.json.write_text(json.dumps(results, indent=2) + "\n")
+        if mismatched:
+            print(f"all-time totals differ from the reference dedup: {', '.join(mismatched)}", file=sys.stderr)
+            return 1
+        print(f"dedup: {expected['messages']} messages, identical across parse and scan modes", flush=True)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+        if args.corpus is None and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
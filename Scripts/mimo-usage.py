@@ -7,153 +7,934 @@ sums input/output/cache tokens per time window (today/week/all),
 writes to ~/.codexbar/mimo-local-usage.json, and prints a human-readable
 summary by default.
 
+Scans are incremental: a checkpoint next to the cache (mimo-local-usage.sqlite3)
+records each session file's inode, size, mtime and last parsed byte offset plus
+the usage rows it contributed. Unchanged files are skipped, appended files only
+parse their new tail, and truncated or replaced files are rescanned.
+
+The same database keeps the dedup index: one row per message identity holding
+the winning (latest) timestamp and token counts. New rows are upserted against
+it, so memory stays flat as history grows. Triggers on the index maintain a
+rollup of hourly buckets for the last two weeks and daily buckets before that;
+windows are range sums over those buckets plus the partial bucket at the start.
+
+Several homes can be scanned in one pass with MIMO_CLAUDE_HOMES (a path list,
+globs allowed, e.g. "~/.claude-envs/*"). Each root keeps its own file
+checkpoints and buckets, while the dedup index spans all roots: a message
+copied between roots counts once in the totals, under the root holding its
+winning row, so the per-root breakdown adds up to the totals.
+
 Usage:
   mimo-usage              # show summary (also refreshes cache)
   mimo-usage --update     # refresh cache only, no output (for LaunchAgent/wrapper)
   mimo-usage --json       # JSON output
   mimo-usage --short      # 1-line status (for status line / widget)
+  mimo-usage --rescan     # drop the checkpoint and rescan every session file
+  mimo-usage --jobs N     # parse changed files across N processes (0 = one per CPU)
+  mimo-usage --timings    # report scan timing on stderr (a JSON line with --json)
+  mimo-usage --window 5h  # totals for a rolling window (h/d/w)
+  mimo-usage --since 2026-10-01   # totals since a local date or ISO timestamp
+  mimo-usage --watch      # keep the cache fresh as session files grow (inotify or polling)
+  mimo-usage --watch --poll --poll-interval 2   # force the polling fallback
+  MIMO_CLAUDE_HOMES="$HOME/.claude-envs/*" mimo-usage   # every wrapper env, with a per-root breakdown
 """
+import glob
+import hashlib
 import json
+import mmap
 import os
+import re
+import select
+import signal
+import sqlite3
+import struct
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    # Optional faster decoder; the stdlib decoder produces the same rows.
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 
 MIMO_HOME = Path(os.environ.get("MIMO_CLAUDE_HOME", Path.home() / ".claude-envs" / "mimo")).expanduser()
-PROJECTS_DIR = MIMO_HOME / ".claude" / "projects"
+# os.pathsep-separated homes (globs allowed); defaults to MIMO_HOME alone.
+MIMO_HOMES = os.environ.get("MIMO_CLAUDE_HOMES", "")
 CACHE_PATH = Path(
     os.environ.get("MIMO_LOCAL_USAGE_PATH", Path.home() / ".codexbar" / "mimo-local-usage.json")
 ).expanduser()
+STATE_PATH = Path(
+    os.environ.get("MIMO_USAGE_STATE_PATH", CACHE_PATH.with_suffix(".sqlite3"))
+).expanduser()
+
+# Bump when the checkpoint schema or row extraction changes; older state is rebuilt.
+STATE_VERSION = 5
+# Bytes before a file's checkpoint offset that must still match before only its tail is parsed.
+TAIL_FINGERPRINT_BYTES = 64
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+# Lines without this key cannot yield a usage row, so they are skipped before decoding.
+USAGE_MARKER = b'"usage"'
+HOUR_US = 3_600_000_000
+DAY_US = 24 * HOUR_US
+# Usage newer than this many days rolls up by UTC hour; older usage by UTC day.
+HOURLY_RETENTION_DAYS = 14
+HISTORY_DAYS = 30
+WATCH_POLL_SECONDS = 1.0
+WATCH_DEBOUNCE_SECONDS = 0.25
+WATCH_MAX_DELAY_SECONDS = 1.0
+WINDOW_RE = re.compile(r"(\d+)([hdw])")
+WINDOW_UNITS = {"h": timedelta(hours=1), "d": timedelta(days=1), "w": timedelta(weeks=1)}
+
+
+def usage_row(d):
+    """Return (identity, timestamp_iso, usage_dict) for an assistant message with usage, else None."""
+    if not isinstance(d, dict):
+        return None
+    ts = d.get("timestamp")
+    msg = d.get("message")
+    if not isinstance(msg, dict):
+        return None
+    usage = msg.get("usage")
+    if not isinstance(usage, dict):
+        return None
+    if not ts:
+        return None
+    metadata = d.get("metadata")
+    message_metadata = msg.get("metadata")
+    session_id = d.get("sessionId") or d.get("session_id")
+    if not session_id and isinstance(metadata, dict):
+        session_id = metadata.get("sessionId")
+    if not session_id and isinstance(message_metadata, dict):
+        session_id = message_metadata.get("sessionId")
+    message_id = msg.get("id")
+    request_id = d.get("requestId") or d.get("request_id")
+    identity = None
+    if all(isinstance(value, str) and value for value in (message_id, request_id)):
+        identity = ("request", message_id, request_id)
+    elif (
+        request_id is None
+        and isinstance(session_id, str)
+        and session_id
+        and isinstance(message_id, str)
+        and message_id
+    ):
+        identity = ("legacy", session_id, message_id)
+    return identity, ts, usage
+
 
+def candidate_lines(buf, start: int, end: int, prefilter=True):
+    """Yield (line_offset, line_bytes) for newline-terminated lines in buf[start:end].
 
-def parse_session_usage(jsonl_path: Path):
-    """Yield (identity, timestamp_iso, usage_dict) for each assistant message with usage."""
+    With `prefilter`, the buffer is searched for the usage key and only the lines
+    containing it are sliced out; every other line is skipped without a copy.
+    """
+    pos = start
+    if not prefilter:
+        while pos < end:
+            line_end = buf.find(b"\n", pos, end) + 1
+            yield pos, buf[pos:line_end]
+            pos = line_end
+        return
+    while True:
+        hit = buf.find(USAGE_MARKER, pos, end)
+        if hit < 0:
+            return
+        newline = buf.rfind(b"\n", pos, hit)
+        line_start = newline + 1 if newline >= 0 else pos
+        line_end = buf.find(b"\n", hit, end) + 1
+        yield line_start, buf[line_start:line_end]
+        pos = line_end
+
+
+def parse_session_usage(jsonl_path: Path, start: int = 0, prefilter=True):
+    """Return ([(line_offset, identity, timestamp_iso, usage_dict), ...], resume_offset).
+
+    The file is memory-mapped and parsing begins at byte `start`; only candidate
+    lines are copied out of the mapping and decoded, so large transcripts are never
+    materialized as text. The resume offset stops before a trailing line that is not
+    newline-terminated and not yet valid JSON, so a half-written append is re-read
+    on the next scan instead of being skipped.
+    """
+    rows = []
     try:
-        with jsonl_path.open() as f:
-            for line in f:
-                try:
-                    d = json.loads(line)
-                    ts = d.get("timestamp")
-                    msg = d.get("message")
-                    if not isinstance(msg, dict):
-                        continue
-                    usage = msg.get("usage")
-                    if not isinstance(usage, dict):
+        with jsonl_path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= start:
+                return rows, start
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as buf:
+                offset = max(start, buf.rfind(b"\n", start) + 1)
+                for line_offset, line in candidate_lines(buf, start, offset, prefilter):
+                    try:
+                        row = usage_row(json_loads(line))
+                    except ValueError:
                         continue
-                    if not ts:
-                        continue
-                    metadata = d.get("metadata")
-                    message_metadata = msg.get("metadata")
-                    session_id = d.get("sessionId") or d.get("session_id")
-                    if not session_id and isinstance(metadata, dict):
-                        session_id = metadata.get("sessionId")
-                    if not session_id and isinstance(message_metadata, dict):
-                        session_id = message_metadata.get("sessionId")
-                    message_id = msg.get("id")
-                    request_id = d.get("requestId") or d.get("request_id")
-                    identity = None
-                    if all(isinstance(value, str) and value for value in (message_id, request_id)):
-                        identity = ("request", message_id, request_id)
-                    elif (
-                        request_id is None
-                        and isinstance(session_id, str)
-                        and session_id
-                        and isinstance(message_id, str)
-                        and message_id
-                    ):
-                        identity = ("legacy", session_id, message_id)
-                    yield identity, ts, usage
-                except (json.JSONDecodeError, ValueError):
-                    continue
-    except (OSError, IOError):
+                    if row is not None:
+                        rows.append((line_offset, *row))
+                if offset < size:
+                    tail = buf[offset:size]
+                    if not prefilter or USAGE_MARKER in tail:
+                        try:
+                            row = usage_row(json_loads(tail))
+                        except ValueError:
+                            return rows, offset
+                        if row is not None:
+                            rows.append((offset, *row))
+                        offset = size
+    except (OSError, ValueError):
+        return [], start
+    return rows, offset
+
+
+def timestamp_us(ts_str):
+    """Microseconds since the epoch for an ISO timestamp (may end with Z), or None."""
+    try:
+        ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - EPOCH) // timedelta(microseconds=1)
+
+
+def token_counts(usage):
+    """(input, output, cache_read, cache_create) token counts, or None when malformed."""
+    try:
+        return tuple(int(usage.get(field, 0) or 0) for field in TOKEN_FIELDS)
+    except (ValueError, TypeError):
+        return None
+
+
+def epoch_us(ts: datetime) -> int:
+    return (ts - EPOCH) // timedelta(microseconds=1)
+
+
+def bucket_delta_sql(row, sign):
+    """Trigger statement adding (sign "+") or removing (sign "-") a winners row from its bucket."""
+    width = f"(CASE WHEN {row}.ts_us < (SELECT horizon_us FROM rollup) THEN {DAY_US} ELSE {HOUR_US} END)"
+    return f"""
+        INSERT INTO buckets (root_id, start_us, width_us, input, output, cache_read, cache_create, messages)
+        VALUES (
+            (SELECT root_id FROM files WHERE file_id = {row}.file_id),
+            {row}.ts_us - {row}.ts_us % {width}, {width}, {sign}{row}.input, {sign}{row}.output,
+            {sign}{row}.cache_read, {sign}{row}.cache_create, {sign}1
+        )
+        ON CONFLICT (root_id, start_us, width_us) DO UPDATE SET
+            input = input + excluded.input,
+            output = output + excluded.output,
+            cache_read = cache_read + excluded.cache_read,
+            cache_create = cache_create + excluded.cache_create,
+            messages = messages + excluded.messages;
+    """
+
+
+def identity_key(identity, file_id, line_offset):
+    """64-bit integer index key for a row; rows without an identity are unique per file position.
+
+    SQLite stores it inline as the winners rowid and in each index; at a million
+    messages a collision (two messages counted once) has odds of about 1 in 10^7.
+    """
+    if identity is None:
+        raw = f"unkeyed\x1f{file_id}\x1f{line_offset}"
+    else:
+        raw = "\x1f".join(identity)
+    digest = hashlib.blake2b(raw.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class CheckpointBusy(Exception):
+    """Another mimo-usage process kept the scan checkpoint locked past the busy timeout."""
+
+
+def is_lock_error(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def open_state(path: Path = STATE_PATH):
+    """Open the scan checkpoint, rebuilding it when missing, corrupt, or from another schema version."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for attempt in range(2):
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != STATE_VERSION:
+                conn.executescript(
+                    """
+                    DROP TABLE IF EXISTS rollup;
+                    DROP TABLE IF EXISTS buckets;
+                    DROP TABLE IF EXISTS winners;
+                    DROP TABLE IF EXISTS rows;
+                    DROP TABLE IF EXISTS files;
+                    DROP TABLE IF EXISTS roots;
+                    -- One projects directory per configured home; files are checkpointed per root.
+                    CREATE TABLE roots (
+                        root_id INTEGER PRIMARY KEY,
+                        path TEXT NOT NULL UNIQUE
+                    );
+                    CREATE TABLE files (
+                        file_id INTEGER PRIMARY KEY,
+                        root_id INTEGER NOT NULL,
+                        path TEXT NOT NULL UNIQUE,
+                        inode INTEGER NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        offset INTEGER NOT NULL,
+                        tail BLOB NOT NULL
+                    );
+                    -- Every file's latest sighting per identity; needed to re-derive a
+                    -- winner when the file holding it is truncated, replaced or removed.
+                    CREATE TABLE rows (
+                        file_id INTEGER NOT NULL,
+                        identity INTEGER NOT NULL,
+                        pos INTEGER NOT NULL,
+                        ts_us INTEGER NOT NULL,
+                        input INTEGER NOT NULL,
+                        output INTEGER NOT NULL,
+                        cache_read INTEGER NOT NULL,
+                        cache_create INTEGER NOT NULL,
+                        PRIMARY KEY (file_id, identity)
+                    ) WITHOUT ROWID;
+                    CREATE INDEX rows_identity ON rows (identity);
+                    -- The dedup index: the winning row per identity across all files.
+                    -- Its file's sighting in rows is identical, so rows finds a file's winners.
+                    CREATE TABLE winners (
+                        identity INTEGER PRIMARY KEY,
+                        file_id INTEGER NOT NULL,
+                        pos INTEGER NOT NULL,
+                        ts_us INTEGER NOT NULL,
+                        input INTEGER NOT NULL,
+                        output INTEGER NOT NULL,
+                        cache_read INTEGER NOT NULL,
+                        cache_create INTEGER NOT NULL
+                    );
+                    CREATE INDEX winners_ts ON winners (ts_us);
+                    -- Token sums of winners per root and UTC hour, or per UTC day before horizon_us.
+                    CREATE TABLE buckets (
+                        root_id INTEGER NOT NULL,
+                        start_us INTEGER NOT NULL,
+                        width_us INTEGER NOT NULL,
+                        input INTEGER NOT NULL,
+                        output INTEGER NOT NULL,
+                        cache_read INTEGER NOT NULL,
+                        cache_create INTEGER NOT NULL,
+                        messages INTEGER NOT NULL,
+                        PRIMARY KEY (root_id, start_us, width_us)
+                    ) WITHOUT ROWID;
+                    CREATE TABLE rollup (horizon_us INTEGER NOT NULL);
+                    INSERT INTO rollup (horizon_us) VALUES (0);
+                    """
+                    + f"""
+                    CREATE TRIGGER winners_rollup_insert AFTER INSERT ON winners BEGIN
+                        {bucket_delta_sql("NEW", "+")}
+                    END;
+                    CREATE TRIGGER winners_rollup_update AFTER UPDATE ON winners BEGIN
+                        {bucket_delta_sql("OLD", "-")}
+                        {bucket_delta_sql("NEW", "+")}
+                    END;
+                    CREATE TRIGGER winners_rollup_delete AFTER DELETE ON winners BEGIN
+                        {bucket_delta_sql("OLD", "-")}
+                    END;
+                    """
+                )
+                conn.execute(f"PRAGMA user_version = {STATE_VERSION}")
+            return conn
+        except sqlite3.OperationalError as error:
+            # Locked or unreadable is not corrupt: never delete a checkpoint another process is using.
+            conn.close()
+            if is_lock_error(error):
+                raise CheckpointBusy(str(error)) from error
+            raise
+        except sqlite3.DatabaseError:
+            conn.close()
+            if attempt:
+                raise
+            path.unlink(missing_ok=True)
+
+
+def read_tail(jsonl_path: Path, offset: int) -> bytes:
+    """The bytes just before `offset`, used to confirm a file was only appended to."""
+    start = max(0, offset - TAIL_FINGERPRINT_BYTES)
+    try:
+        with jsonl_path.open("rb") as f:
+            f.seek(start)
+            return f.read(offset - start)
+    except OSError:
+        return b""
+
+
+UPSERT_ROW = """
+    INSERT INTO rows (identity, file_id, pos, ts_us, input, output, cache_read, cache_create)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (file_id, identity) DO UPDATE SET
+        pos = excluded.pos,
+        ts_us = excluded.ts_us,
+        input = excluded.input,
+        output = excluded.output,
+        cache_read = excluded.cache_read,
+        cache_create = excluded.cache_create
+    WHERE excluded.ts_us >= rows.ts_us
+"""
+# Latest timestamp wins; ties go to the later file, then the later line.
+UPSERT_WINNER = """
+    INSERT INTO winners (identity, file_id, pos, ts_us, input, output, cache_read, cache_create)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (identity) DO UPDATE SET
+        file_id = excluded.file_id,
+        pos = excluded.pos,
+        ts_us = excluded.ts_us,
+        input = excluded.input,
+        output = excluded.output,
+        cache_read = excluded.cache_read,
+        cache_create = excluded.cache_create
+    WHERE (excluded.ts_us, excluded.file_id, excluded.pos) >= (winners.ts_us, winners.file_id, winners.pos)
+"""
+
+
+def scan_file(task):
+    """Parse one session file from its checkpoint offset; runs in a worker process under --jobs.
+
+    Returns (file_id, resume_offset, tail, bytes_parsed, rows) where rows hold one
+    (identity_key, file_id, pos, ts_us, *tokens) tuple per identity, the latest line
+    winning within the file exactly as the rows upsert would.
+    """
+    file_id, path, start = task
+    jsonl_path = Path(path)
+    parsed, offset = parse_session_usage(jsonl_path, start)
+    latest = {}
+    for line_offset, identity, ts_str, usage in parsed:
+        ts_us = timestamp_us(ts_str)
+        tokens = token_counts(usage)
+        if ts_us is None or tokens is None:
+            continue
+        key = identity_key(identity, file_id, line_offset)
+        previous = latest.get(key)
+        if previous is None or ts_us >= previous[3]:
+            latest[key] = (key, file_id, line_offset, ts_us, *tokens)
+    return file_id, offset, read_tail(jsonl_path, offset), offset - start, list(latest.values())
+
+
+def store_rows(conn, rows):
+    """Upsert one file's usage rows into its sightings and the dedup index."""
+    conn.executemany(UPSERT_ROW, rows)
+    conn.executemany(UPSERT_WINNER, rows)
+
+
+def drop_file_rows(conn, file_id):
+    """Forget a file's rows and re-derive any winners it held from the remaining files."""
+    orphaned = [
+        identity
+        for (identity,) in conn.execute(
+            """
+            SELECT rows.identity FROM rows JOIN winners USING (identity)
+            WHERE rows.file_id = ? AND winners.file_id = rows.file_id
+            """,
+            (file_id,),
+        )
+    ]
+    conn.executemany("DELETE FROM winners WHERE identity = ?", ((identity,) for identity in orphaned))
+    conn.execute("DELETE FROM rows WHERE file_id = ?", (file_id,))
+    for identity in orphaned:
+        best = conn.execute(
+            """
+            SELECT identity, file_id, pos, ts_us, input, output, cache_read, cache_create
+            FROM rows WHERE identity = ?
+            ORDER BY ts_us DESC, file_id DESC, pos DESC LIMIT 1
+            """,
+            (identity,),
+        ).fetchone()
+        if best is not None:
+            conn.execute(UPSERT_WINNER, best)
+
+
+def configured_roots():
+    """{label: projects_dir} for each home in MIMO_CLAUDE_HOMES (globs expanded), else MIMO_HOME alone.
+
+    Labels are home directory names, or the full path when two homes share a name.
+    """
+    homes = []
+    for entry in filter(None, MIMO_HOMES.split(os.pathsep)):
+        entry = os.path.expanduser(entry)
+        if glob.escape(entry) != entry:
+            homes.extend(Path(match) for match in sorted(glob.glob(entry)) if os.path.isdir(match))
+        else:
+            homes.append(Path(entry))
+    homes = list(dict.fromkeys(homes or [MIMO_HOME]))
+    names = [home.name for home in homes]
+    return {
+        (home.name if names.count(home.name) == 1 else str(home)): home / ".claude" / "projects"
+        for home in homes
+    }
+
+
+def sync_roots(conn, roots):
+    """Register newly configured roots and forget unconfigured ones; return {root_id: (label, projects_dir)}.
+
+    A forgotten root's files are dropped like deleted files, so any message it shared
+    with a remaining root is re-derived from that root's copy.
+    """
+    wanted = {str(projects_dir): (label, projects_dir) for label, projects_dir in roots.items()}
+    registered = {}
+    for root_id, path in conn.execute("SELECT root_id, path FROM roots").fetchall():
+        if path in wanted:
+            registered[path] = root_id
+            continue
+        for (file_id,) in conn.execute("SELECT file_id FROM files WHERE root_id = ?", (root_id,)).fetchall():
+            drop_file_rows(conn, file_id)
+        conn.execute("DELETE FROM files WHERE root_id = ?", (root_id,))
+        conn.execute("DELETE FROM buckets WHERE root_id = ?", (root_id,))
+        conn.execute("DELETE FROM roots WHERE root_id = ?", (root_id,))
+    active = {}
+    for path, root in wanted.items():
+        root_id = registered.get(path)
+        if root_id is None:
+            root_id = conn.execute("INSERT INTO roots (path) VALUES (?)", (path,)).lastrowid
+        active[root_id] = root
+    return active
+
+
+def refresh_checkpoint(conn, roots, jobs=1, stats=None, paths=None):
+    """Bring the checkpoint in line with the session files on disk; return how many are tracked.
+
+    `roots` maps root ids to their projects directories. Changed files are parsed
+    serially, or across `jobs` worker processes. Results are stored in sorted path
+    order within each root either way, so both paths produce identical indexes.
+    `paths` limits the refresh to those session files (as reported by --watch); by
+    default every root is walked and files no longer on disk are forgotten.
+    """
+    query = "SELECT file_id, path, inode, size, mtime_ns, offset, tail FROM files"
+    candidates = []
+    if paths is None:
+        for root_id, projects_dir in roots.items():
+            if projects_dir.exists():
+                candidates.extend((root_id, jsonl) for jsonl in sorted(projects_dir.rglob("*.jsonl")))
+        known_rows = conn.execute(query).fetchall()
+    else:
+        for jsonl in sorted(Path(path) for path in paths):
+            root_id = next((root_id for root_id, root in roots.items() if jsonl.is_relative_to(root)), None)
+            if root_id is not None:
+                candidates.append((root_id, jsonl))
+        known_rows = [
+            row for _, jsonl in candidates for row in conn.execute(query + " WHERE path = ?", (str(jsonl),))
+        ]
+    known = {row[1]: (row[0], *row[2:]) for row in known_rows}
+    seen = set()
+    tasks = []
+    stat_results = {}
+    for root_id, jsonl in candidates:
+        try:
+            st = jsonl.stat()
+        except OSError:
+            continue
+        path = str(jsonl)
+        seen.add(path)
+        entry = known.get(path)
+        start = 0
+        if entry is None:
+            file_id = conn.execute(
+                "INSERT INTO files (root_id, path, inode, size, mtime_ns, offset, tail) VALUES (?, ?, ?, 0, 0, 0, x'')",
+                (root_id, path, st.st_ino),
+            ).lastrowid
+        else:
+            file_id, inode, size, mtime_ns, offset, tail = entry
+            if (inode, size, mtime_ns) == (st.st_ino, st.st_size, st.st_mtime_ns):
+                continue
+            if inode == st.st_ino and st.st_size >= offset and read_tail(jsonl, offset) == tail:
+                start = offset
+            else:
+                # Truncated or replaced: everything this file contributed is re-read.
+                drop_file_rows(conn, file_id)
+        tasks.append((file_id, path, start))
+        stat_results[file_id] = st
+
+    workers = min(jobs, len(tasks))
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    parsed_bytes = 0
+    try:
+        if pool:
+            results = pool.map(scan_file, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+        else:
+            results = map(scan_file, tasks)
+        for file_id, offset, tail, bytes_parsed, rows in results:
+            st = stat_results[file_id]
+            store_rows(conn, rows)
+            conn.execute(
+                "UPDATE files SET inode = ?, size = ?, mtime_ns = ?, offset = ?, tail = ? WHERE file_id = ?",
+                (st.st_ino, st.st_size, st.st_mtime_ns, offset, tail, file_id),
+            )
+            parsed_bytes += bytes_parsed
+    finally:
+        if pool:
+            pool.shutdown()
+
+    for path, entry in known.items():
+        if path not in seen:
+            drop_file_rows(conn, entry[0])
+            conn.execute("DELETE FROM files WHERE file_id = ?", (entry[0],))
+    files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    if stats is not None:
+        stats.update(
+            files=files,
+            parsed_files=len(tasks),
+            parsed_bytes=parsed_bytes,
+            jobs=max(1, workers),
+        )
+    return files
+
+
+def compact_rollup(conn, now: datetime):
+    """Fold hourly buckets older than the retention period into daily buckets."""
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    horizon_us = epoch_us(today_start - timedelta(days=HOURLY_RETENTION_DAYS))
+    if horizon_us <= conn.execute("SELECT horizon_us FROM rollup").fetchone()[0]:
         return
+    conn.execute(
+        f"""
+        INSERT INTO buckets (root_id, start_us, width_us, input, output, cache_read, cache_create, messages)
+        SELECT root_id, start_us - start_us % {DAY_US}, {DAY_US}, SUM(input), SUM(output), SUM(cache_read),
+               SUM(cache_create), SUM(messages)
+        FROM buckets WHERE width_us = {HOUR_US} AND start_us < ?
+        GROUP BY root_id, start_us - start_us % {DAY_US}
+        ON CONFLICT (root_id, start_us, width_us) DO UPDATE SET
+            input = input + excluded.input,
+            output = output + excluded.output,
+            cache_read = cache_read + excluded.cache_read,
+            cache_create = cache_create + excluded.cache_create,
+            messages = messages + excluded.messages
+        """,
+        (horizon_us,),
+    )
+    conn.execute(f"DELETE FROM buckets WHERE width_us = {HOUR_US} AND start_us < ?", (horizon_us,))
+    conn.execute("DELETE FROM buckets WHERE messages = 0")
+    conn.execute("UPDATE rollup SET horizon_us = ?", (horizon_us,))
+
+
+def totals_dict(row):
+    input_t, output_t, cache_read_t, cache_create_t, messages = row
+    return {
+        "input": input_t,
+        "output": output_t,
+        "cache_read": cache_read_t,
+        "cache_create": cache_create_t,
+        "messages": messages,
+    }
 
 
-def aggregate_usage():
-    """Scan all mimo session jsonls and return windowed token sums."""
+def window_totals(conn, since_us=None, root_id=None):
+    """Exact token sums over deduplicated rows at or after `since_us` (all rows when None).
+
+    Whole buckets come from the rollup; rows in the partial bucket before the first
+    whole one are summed from the dedup index. With `root_id`, only messages whose
+    winning row lives in that root are counted.
+    """
+    sums = """
+        SELECT COALESCE(SUM(input), 0), COALESCE(SUM(output), 0), COALESCE(SUM(cache_read), 0),
+               COALESCE(SUM(cache_create), 0), COALESCE(SUM({messages}), 0)
+    """
+    bucket_scope, winner_scope, scope_args = "", "", ()
+    if root_id is not None:
+        bucket_scope = " AND root_id = ?"
+        winner_scope = " AND file_id IN (SELECT file_id FROM files WHERE root_id = ?)"
+        scope_args = (root_id,)
+    if since_us is None:
+        query = sums.format(messages="messages") + " FROM buckets WHERE 1" + bucket_scope
+        return totals_dict(conn.execute(query, scope_args).fetchone())
+    horizon_us = conn.execute("SELECT horizon_us FROM rollup").fetchone()[0]
+    width = DAY_US if since_us < horizon_us else HOUR_US
+    boundary = -(-since_us // width) * width
+    head = conn.execute(
+        sums.format(messages="1") + " FROM winners WHERE ts_us >= ? AND ts_us < ?" + winner_scope,
+        (since_us, boundary, *scope_args),
+    ).fetchone()
+    body = conn.execute(
+        sums.format(messages="messages") + " FROM buckets WHERE start_us >= ?" + bucket_scope,
+        (boundary, *scope_args),
+    ).fetchone()
+    return totals_dict(tuple(a + b for a, b in zip(head, body)))
+
+
+def daily_history(conn, since_us):
+    """Per-UTC-day token sums from `since_us` on, oldest first, for history charts."""
+    history = []
+    for day_us, *totals in conn.execute(
+        f"""
+        SELECT start_us - start_us % {DAY_US} AS day_us, SUM(input), SUM(output), SUM(cache_read),
+               SUM(cache_create), SUM(messages)
+        FROM buckets WHERE start_us >= ? AND messages > 0
+        GROUP BY day_us ORDER BY day_us
+        """,
+        (since_us,),
+    ):
+        day = EPOCH + timedelta(microseconds=day_us)
+        history.append({"date": day.date().isoformat(), **totals_dict(totals)})
+    return history
+
+
+def aggregate_usage(rescan=False, jobs=1, stats=None, ranges=None, paths=None, conn=None):
+    """Refresh the scan checkpoint and return windowed token sums over all mimo session jsonls.
+
+    Returns (windows, sessions_scanned, last_activity, history, roots). `roots` is
+    empty for a single home; with several it maps each root label to its own
+    sessions_scanned and windows. `ranges` maps extra window labels to start
+    datetimes; their totals are added to `windows`. When
+    `stats` is a dict it receives scan counters and phase timings for --timings.
+    `paths` restricts the refresh to known-changed files, and an open `conn` is
+    reused (and left open) by long-running callers such as --watch.
+    """
+    started = time.monotonic()
     now = datetime.now(timezone.utc)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     # Week starts on Monday 00:00 UTC
     week_start = today_start - timedelta(days=today_start.weekday())
 
-    windows = {
-        "today": {"input": 0, "output": 0, "cache_read": 0, "cache_create": 0, "messages": 0},
-        "week": {"input": 0, "output": 0, "cache_read": 0, "cache_create": 0, "messages": 0},
-        "all_time": {"input": 0, "output": 0, "cache_read": 0, "cache_create": 0, "messages": 0},
-    }
-    sessions_scanned = 0
+    starts = {"today": epoch_us(today_start), "week": epoch_us(week_start), "all_time": None}
+    starts.update((label, epoch_us(since)) for label, since in (ranges or {}).items())
+
+    if rescan:
+        STATE_PATH.unlink(missing_ok=True)
+    owns_conn = conn is None
+    if owns_conn:
+        conn = open_state()
+    try:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as error:
+            if is_lock_error(error):
+                raise CheckpointBusy(str(error)) from error
+            raise
+        try:
+            compact_rollup(conn, now)
+            active = sync_roots(conn, configured_roots())
+            sessions_scanned = refresh_checkpoint(
+                conn,
+                {root_id: projects_dir for root_id, (_, projects_dir) in active.items()},
+                jobs=jobs,
+                stats=stats,
+                paths=paths,
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        scanned = time.monotonic()
+        windows = {label: window_totals(conn, since_us) for label, since_us in starts.items()}
+        roots = {}
+        if len(active) > 1:
+            files = dict(conn.execute("SELECT root_id, COUNT(*) FROM files GROUP BY root_id"))
+            for root_id, (root_label, _) in active.items():
+                roots[root_label] = {
+                    "sessions_scanned": files.get(root_id, 0),
+                    "windows": {label: window_totals(conn, since_us, root_id) for label, since_us in starts.items()},
+                }
+        history = daily_history(conn, epoch_us(today_start - timedelta(days=HISTORY_DAYS - 1)))
+        last_activity_us = conn.execute("SELECT MAX(ts_us) FROM winners").fetchone()[0]
+    finally:
+        if owns_conn:
+            conn.close()
+    if stats is not None:
+        stats.update(scan_seconds=scanned - started, totals_seconds=time.monotonic() - scanned)
+
     last_activity = None
-    keyed_rows = {}
-    unkeyed_rows = []
+    if last_activity_us is not None:
+        last_activity = EPOCH + timedelta(microseconds=last_activity_us)
+    return windows, sessions_scanned, last_activity, history, roots
 
-    if not PROJECTS_DIR.exists():
-        return windows, sessions_scanned, last_activity
 
-    for jsonl in PROJECTS_DIR.rglob("*.jsonl"):
-        sessions_scanned += 1
-        for identity, ts_str, usage in parse_session_usage(jsonl):
-            try:
-                # Parse ISO timestamp (may end with Z)
-                ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                if ts.tzinfo is None:
-                    ts = ts.replace(tzinfo=timezone.utc)
-            except (ValueError, TypeError):
+class InotifyWatcher:
+    """Linux inotify watch over the projects trees; reports changed session file paths."""
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, roots):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        for root in roots:
+            self.add_tree(root)
+
+    def add_tree(self, directory: Path):
+        for path in [directory, *(p for p in directory.rglob("*") if p.is_dir())]:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+            if wd >= 0:
+                self.dirs[wd] = path
+
+    def wait(self, timeout):
+        """Block up to `timeout` seconds; return changed paths, or None when a full walk is needed."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        changed = set()
+        full_walk = False
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        pos = 0
+        while pos + self.EVENT.size <= len(data):
+            wd, mask, _cookie, length = self.EVENT.unpack_from(data, pos)
+            name = data[pos + self.EVENT.size : pos + self.EVENT.size + length].rstrip(b"\0")
+            pos += self.EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                full_walk = True
+                continue
+            directory = self.dirs.get(wd)
+            if mask & self.IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Files may land in a new directory before its watch exists.
+                    self.add_tree(path)
+                    changed.update(path.rglob("*.jsonl"))
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    full_walk = True
+            elif path.suffix == ".jsonl":
+                changed.add(path)
+        return None if full_walk else changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: stats the projects trees every `interval` seconds."""
+
+    def __init__(self, roots, interval: float):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for root in self.roots:
+            if not root.exists():
                 continue
+            for path in root.rglob("*.jsonl"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_ino, st.st_size, st.st_mtime_ns)
+        return snapshot
 
-            row = (ts, usage)
-            if identity is None:
-                unkeyed_rows.append(row)
+    def wait(self, timeout):
+        """Sleep up to `timeout` seconds (one poll interval at most); return changed paths."""
+        time.sleep(max(0.0, min(self.interval, timeout)))
+        current = self.scan()
+        changed = {path for path, key in current.items() if self.snapshot.get(path) != key}
+        changed.update(path for path in self.snapshot if path not in current)
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(roots, poll: bool, interval: float):
+    """inotify on Linux when every tree exists, else the polling fallback."""
+    if not poll and sys.platform.startswith("linux") and all(root.is_dir() for root in roots):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(roots, interval)
+
+
+def watch(rescan=False, jobs=1, poll=False, interval=WATCH_POLL_SECONDS, timings=False):
+    """Follow session file appends and rewrite the cache within about a second of each change.
+
+    Changes are debounced: once a change arrives, further changes are collected
+    until the tree has been quiet for WATCH_DEBOUNCE_SECONDS or WATCH_MAX_DELAY_SECONDS
+    have passed. The cache is also rewritten at each UTC hour so windows roll over
+    and the cache never looks stale while idle; homes added to or removed from
+    MIMO_CLAUDE_HOMES are picked up on the next refresh.
+    """
+    if rescan:
+        STATE_PATH.unlink(missing_ok=True)
+    conn = open_state()
+    roots = list(configured_roots().values())
+    watcher = open_watcher(roots, poll, interval)
+    paths = None
+    try:
+        while True:
+            current = list(configured_roots().values())
+            if current != roots:
+                watcher.close()
+                roots = current
+                watcher = open_watcher(roots, poll, interval)
+                paths = None
+            stats = {}
+            flush_at = None
+            try:
+                windows, sessions_scanned, last_activity, history, by_root = aggregate_usage(
+                    jobs=jobs, stats=stats, paths=paths, conn=conn
+                )
+            except CheckpointBusy as error:
+                # Another run is scanning; its result lands in the checkpoint. Retry with a full refresh soon.
+                print(f"mimo-usage: another update is running ({error}); retrying", file=sys.stderr, flush=True)
+                paths = None
+                flush_at = time.monotonic() + WATCH_MAX_DELAY_SECONDS
             else:
-                previous = keyed_rows.get(identity)
-                if previous is None or ts >= previous[0]:
-                    keyed_rows[identity] = row
-
-    for ts, usage in [*keyed_rows.values(), *unkeyed_rows]:
-        input_t = int(usage.get("input_tokens", 0) or 0)
-        output_t = int(usage.get("output_tokens", 0) or 0)
-        cache_read_t = int(usage.get("cache_read_input_tokens", 0) or 0)
-        cache_create_t = int(usage.get("cache_creation_input_tokens", 0) or 0)
-
-        if last_activity is None or ts > last_activity:
-            last_activity = ts
-
-        # all_time
-        w = windows["all_time"]
-        w["input"] += input_t
-        w["output"] += output_t
-        w["cache_read"] += cache_read_t
-        w["cache_create"] += cache_create_t
-        w["messages"] += 1
-
-        if ts >= week_start:
-            w = windows["week"]
-            w["input"] += input_t
-            w["output"] += output_t
-            w["cache_read"] += cache_read_t
-            w["cache_create"] += cache_create_t
-            w["messages"] += 1
-
-        if ts >= today_start:
-            w = windows["today"]
-            w["input"] += input_t
-            w["output"] += output_t
-            w["cache_read"] += cache_read_t
-            w["cache_create"] += cache_create_t
-            w["messages"] += 1
-
-    return windows, sessions_scanned, last_activity
-
-
-def write_cache(windows, sessions_scanned, last_activity):
+                write_cache(windows, sessions_scanned, last_activity, history, by_root)
+                if timings:
+                    print(timing_report(stats), file=sys.stderr, flush=True)
+                paths = set()
+            tick_at = time.monotonic() + 3600 - datetime.now(timezone.utc).timestamp() % 3600
+            while True:
+                if flush_at is None:
+                    timeout = tick_at - time.monotonic()
+                else:
+                    timeout = min(WATCH_DEBOUNCE_SECONDS, flush_at - time.monotonic())
+                if timeout <= 0:
+                    break
+                changed = watcher.wait(timeout)
+                if changed is None:
+                    paths = None
+                elif paths is not None:
+                    paths.update(changed)
+                if changed is None or changed:
+                    flush_at = flush_at or time.monotonic() + WATCH_MAX_DELAY_SECONDS
+                elif flush_at is not None:
+                    break
+    finally:
+        watcher.close()
+        conn.close()
+
+
+def write_cache(windows, sessions_scanned, last_activity, history=(), roots=None):
     CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
     payload = {
         "updated_at": datetime.now(timezone.utc).isoformat(),
         "last_activity": last_activity.isoformat() if last_activity else None,
         "sessions_scanned": sessions_scanned,
         "windows": windows,
+        "daily": list(history),
         "source": "local-jsonl-scan",
         "note": "Local token accounting from cc-mimo session jsonl. Not a quota; mimo platform.xiaomimimo.com SSO cookie required for real quota.",
     }
+    if roots:
+        payload["roots"] = roots
     tmp = CACHE_PATH.with_suffix(".json.tmp")
     tmp.write_text(json.dumps(payload, indent=2))
     tmp.replace(CACHE_PATH)
@@ -175,6 +956,16 @@ def short_status(payload):
     return f"mimo: {fmt_tokens(total)} tok this week ({w['messages']} msg)"
 
 
+def window_line(label, w):
+    """One summary line for a window's totals."""
+    in_t = fmt_tokens(w["input"])
+    out_t = fmt_tokens(w["output"])
+    cr_t = fmt_tokens(w["cache_read"])
+    cc_t = fmt_tokens(w["cache_create"])
+    total = w["input"] + w["output"] + w["cache_read"] + w["cache_create"]
+    return f"{label:>10}: {fmt_tokens(total):>8} total | in={in_t} out={out_t} cache_r={cr_t} cache_c={cc_t} | msg={w['messages']}"
+
+
 def human_summary(payload):
     """Multi-line human-readable summary."""
     last = payload.get("last_activity")
@@ -202,30 +993,121 @@ def human_summary(payload):
         "",
     ]
     for window_name, label in [("today", "Today"), ("week", "This week"), ("all_time", "All time")]:
-        w = payload["windows"][window_name]
-        in_t = fmt_tokens(w["input"])
-        out_t = fmt_tokens(w["output"])
-        cr_t = fmt_tokens(w["cache_read"])
-        cc_t = fmt_tokens(w["cache_create"])
-        total = w["input"] + w["output"] + w["cache_read"] + w["cache_create"]
-        lines.append(f"{label:>10}: {fmt_tokens(total):>8} total | in={in_t} out={out_t} cache_r={cr_t} cache_c={cc_t} | msg={w['messages']}")
+        lines.append(window_line(label, payload["windows"][window_name]))
+    if payload.get("roots"):
+        lines.append("")
+        lines.append("All time per root:")
+        for root, entry in payload["roots"].items():
+            lines.append(window_line(root, entry["windows"]["all_time"]))
     lines.append("")
     lines.append("Note: this is local accounting from cc-mimo session jsonl.")
     lines.append("Real platform quota requires Chrome cookie (cookieSource=manual).")
     return "\n".join(lines)
 
 
+def timing_report(stats):
+    """1-line scan timing summary for --timings."""
+    megabytes = stats["parsed_bytes"] / 1_000_000
+    rate = megabytes / stats["scan_seconds"] if stats["scan_seconds"] > 0 else 0
+    return (
+        f"mimo-usage: parsed {stats['parsed_files']}/{stats['files']} files ({megabytes:.1f} MB) "
+        f"in {stats['scan_seconds']:.2f}s with {stats['jobs']} job(s) ({rate:.1f} MB/s); "
+        f"windows in {stats['totals_seconds'] * 1000:.1f}ms"
+    )
+
+
+def option_value(args, name):
+    """Value of `--name N` or `--name=N` in argv, else None."""
+    for index, arg in enumerate(args):
+        if arg == name and index + 1 < len(args):
+            return args[index + 1]
+        if arg.startswith(name + "="):
+            return arg[len(name) + 1 :]
+    return None
+
+
+def parse_ranges(args):
+    """Extra windows from --window (rolling h/d/w) and --since (local date or ISO timestamp)."""
+    ranges = {}
+    window = option_value(args, "--window")
+    if window is not None:
+        match = WINDOW_RE.fullmatch(window)
+        if not match:
+            raise ValueError("--window expects a duration like 5h, 7d or 2w")
+        ranges[f"last {window}"] = datetime.now(timezone.utc) - int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+    since = option_value(args, "--since")
+    if since is not None:
+        try:
+            start = datetime.fromisoformat(since.replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError("--since expects a date or ISO timestamp like 2026-10-01") from None
+        # Naive values are local time, so --since 2026-10-01 means local midnight.
+        ranges[f"since {since}"] = start if start.tzinfo else start.astimezone()
+    return ranges
+
+
 def main():
     args = sys.argv[1:]
     quiet = "--update" in args
     json_out = "--json" in args
     short = "--short" in args
+    rescan = "--rescan" in args
+    timings = "--timings" in args
+    try:
+        jobs = int(option_value(args, "--jobs") or 1)
+    except ValueError:
+        print("mimo-usage: --jobs expects a number", file=sys.stderr)
+        return 2
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if "--watch" in args:
+        try:
+            interval = float(option_value(args, "--poll-interval") or WATCH_POLL_SECONDS)
+        except ValueError:
+            print("mimo-usage: --poll-interval expects seconds", file=sys.stderr)
+            return 2
+        # launchd and systemd stop daemons with SIGTERM; exit through the cleanup path.
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            watch(rescan=rescan, jobs=jobs, poll="--poll" in args, interval=interval, timings=timings)
+        except KeyboardInterrupt:
+            pass
+        except CheckpointBusy as error:
+            print(f"mimo-usage: another update is running ({error}); try again shortly", file=sys.stderr)
+            return 1
+        return 0
+    try:
+        ranges = parse_ranges(args)
+    except ValueError as error:
+        print(f"mimo-usage: {error}", file=sys.stderr)
+        return 2
 
-    windows, sessions_scanned, last_activity = aggregate_usage()
-    payload = write_cache(windows, sessions_scanned, last_activity)
+    stats = {}
+    try:
+        windows, sessions_scanned, last_activity, history, roots = aggregate_usage(
+            rescan=rescan, jobs=jobs, stats=stats, ranges=ranges
+        )
+    except CheckpointBusy as error:
+        print(f"mimo-usage: another update is running ({error}); try again shortly", file=sys.stderr)
+        return 1
+    extra = {label: windows.pop(label) for label in ranges}
+    extra_by_root = {root: {label: entry["windows"].pop(label) for label in ranges} for root, entry in roots.items()}
+    payload = write_cache(windows, sessions_scanned, last_activity, history, roots)
+    if timings:
+        print(json.dumps(stats) if json_out else timing_report(stats), file=sys.stderr)
 
     if quiet:
         return 0
+    if extra:
+        if json_out:
+            print(json.dumps({**extra, "roots": extra_by_root} if extra_by_root else extra, indent=2))
+        else:
+            lines = []
+            for label, w in extra.items():
+                lines.append(window_line(label, w))
+                lines.extend(window_line(root, root_extra[label]) for root, root_extra in extra_by_root.items())
+            print("\n".join(lines))
+        return 0
     if json_out:
         print(json.dumps(payload, indent=2))
         return 0
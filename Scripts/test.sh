@@ -29,6 +29,31 @@ case "${RETRY_NON_TIMEOUT_FAILURES}" in
     ;;
 esac
 
+if [[ -n "${CODEXBAR_TEST_DURATIONS:-}" ]]; then
+  ARGS+=(--durations "${CODEXBAR_TEST_DURATIONS}")
+fi
+if [[ -n "${CODEXBAR_TEST_TARGET_GROUP_SECONDS:-}" ]]; then
+  ARGS+=(--target-group-seconds "${CODEXBAR_TEST_TARGET_GROUP_SECONDS}")
+fi
+if [[ -n "${CODEXBAR_TEST_WORKERS:-}" ]]; then
+  ARGS+=(--workers "${CODEXBAR_TEST_WORKERS}")
+fi
+if [[ -n "${CODEXBAR_TEST_TIMEOUT_RECOVERY:-}" ]]; then
+  ARGS+=(--timeout-recovery "${CODEXBAR_TEST_TIMEOUT_RECOVERY}")
+fi
+if [[ -n "${CODEXBAR_TEST_DISCOVERY_CACHE:-}" ]]; then
+  ARGS+=(--discovery-cache "${CODEXBAR_TEST_DISCOVERY_CACHE}")
+fi
+if [[ -n "${CODEXBAR_TEST_REPORT:-}" ]]; then
+  ARGS+=(--report "${CODEXBAR_TEST_REPORT}")
+fi
+if [[ -n "${CODEXBAR_TEST_JUNIT:-}" ]]; then
+  ARGS+=(--junit "${CODEXBAR_TEST_JUNIT}")
+fi
+if [[ -n "${CODEXBAR_TEST_LEDGER:-}" ]]; then
+  ARGS+=(--ledger "${CODEXBAR_TEST_LEDGER}")
+fi
+
 if [[ -n "${CODEXBAR_TEST_SHARD_INDEX:-}" || -n "${CODEXBAR_TEST_SHARD_COUNT:-}" ]]; then
   ARGS+=(
     --shard-index "${CODEXBAR_TEST_SHARD_INDEX:?CODEXBAR_TEST_SHARD_COUNT requires CODEXBAR_TEST_SHARD_INDEX}"
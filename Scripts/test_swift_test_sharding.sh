@@ -68,6 +68,29 @@ case "${FAKE_SWIFT_MODE:-success}" in
       sleep 2
     fi
     ;;
+  hang_gamma)
+    if [[ "$*" == *"Gamma"* ]]; then
+      sleep 2
+    fi
+    ;;
+  fail_beta)
+    if [[ "$*" == *"Beta"* ]]; then
+      exit 1
+    fi
+    ;;
+  group_sleep)
+    if [[ "${is_group}" == "1" ]]; then
+      printf 'start %s\n' "$*"
+      sleep 1
+      printf 'end %s\n' "$*"
+    fi
+    ;;
+  flaky_eta)
+    # Eta fails every other run: the first group run, then its first run on its own.
+    if [[ "$*" == *"Eta"* && "$(( $(next_group_attempt) % 2 ))" == "1" ]]; then
+      exit 1
+    fi
+    ;;
   group_fail_then_timeout)
     if [[ "${is_group}" == "1" ]]; then
       attempt="$(next_group_attempt)"
@@ -142,12 +165,14 @@ grep -Fq '| First-pass successful groups | `2` |' "${GITHUB_STEP_SUMMARY}"
 grep -Fq '| First-pass failed groups | `1` |' "${GITHUB_STEP_SUMMARY}"
 grep -Fq '| Full-group retries | `1` |' "${GITHUB_STEP_SUMMARY}"
 grep -Fq '| Recovered groups | `1` |' "${GITHUB_STEP_SUMMARY}"
-[[ "$(grep -c '^test --skip-build --no-parallel' "${FAKE_SWIFT_LOG}")" -eq 4 ]]
+grep -Fq '| Isolated selection retries | `4` |' "${GITHUB_STEP_SUMMARY}"
+# The recovered group's members each run alone once to find which one flaked.
+[[ "$(grep -c '^test --skip-build --no-parallel' "${FAKE_SWIFT_LOG}")" -eq 8 ]]
 grep -Fq "CodexBarTests\\.Alpha" "${FAKE_SWIFT_LOG}"
 grep -Fq "CodexBarTests\\.Beta" "${FAKE_SWIFT_LOG}"
 grep -Fq "CodexBarTests\\..*top\\ level\\ works" "${FAKE_SWIFT_LOG}"
 grep -Fq "CodexBarTests\\..*top/level\\ slash\\ works" "${FAKE_SWIFT_LOG}"
-[[ "$(wc -l < "${FAKE_SWIFT_LOG}")" -eq 5 ]]
+[[ "$(wc -l < "${FAKE_SWIFT_LOG}")" -eq 9 ]]
 
 reset_case strict
 export FAKE_SWIFT_MODE=group_fail_once
@@ -198,6 +223,73 @@ run_harness --group-size 4 --timeout 10 --list-only \
   | sort > "${TEMP_DIR}/shards-expected.log"
 diff -u "${TEMP_DIR}/shards-expected.log" "${TEMP_DIR}/shards-combined.log"
 
+DURATIONS="${TEMP_DIR}/durations.json"
+cat > "${DURATIONS}" <<'JSON'
+{
+  "version": 1,
+  "selections": {
+    "CodexBarTests.Alpha": 30,
+    "CodexBarTests.Beta": 30,
+    "CodexBarTests.Gamma": 30,
+    "CodexBarTests.Delta": 30
+  }
+}
+JSON
+cp "${DURATIONS}" "${TEMP_DIR}/durations-seed.json"
+for shard in 0 1; do
+  reset_case "balanced-list-${shard}"
+  run_harness --group-size 4 --timeout 10 --shard-index "${shard}" --shard-count 2 --durations "${DURATIONS}" \
+    --target-group-seconds 60 --list-only > "${TEMP_DIR}/balanced-list-${shard}.log"
+done
+# Known suites are packed into two 60s groups, one per shard; unknown suites keep the fixed-size chunks.
+grep -Fxq "CodexBarTests.Alpha" "${TEMP_DIR}/balanced-list-0.log"
+grep -Fxq "CodexBarTests.Delta" "${TEMP_DIR}/balanced-list-0.log"
+grep -Fxq "CodexBarTests.Beta" "${TEMP_DIR}/balanced-list-1.log"
+grep -Fxq "CodexBarTests.Gamma" "${TEMP_DIR}/balanced-list-1.log"
+cat "${TEMP_DIR}/balanced-list-0.log" "${TEMP_DIR}/balanced-list-1.log" \
+  | grep -v '^Discovered ' \
+  | sort > "${TEMP_DIR}/balanced-combined.log"
+diff -u "${TEMP_DIR}/shards-expected.log" "${TEMP_DIR}/balanced-combined.log"
+cmp -s "${DURATIONS}" "${TEMP_DIR}/durations-seed.json"
+
+reset_case balanced
+export FAKE_SWIFT_MODE=success
+run_harness --group-size 4 --timeout 10 --shard-index 0 --shard-count 2 --durations "${DURATIONS}" \
+  --target-group-seconds 60 > "${TEMP_DIR}/balanced.log"
+grep -Fq '| Known-duration selections | `2/6` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Predicted execution seconds | `60.0` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| 1/2 | `60.0` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| 2/2 | `60.0` | `-` |' "${GITHUB_STEP_SUMMARY}"
+python3 - "${DURATIONS}" <<'PY'
+import json
+import sys
+
+selections = json.load(open(sys.argv[1]))["selections"]
+# Measured shard-0 selections move toward the fake's near-zero runtime; shard 1's entries are untouched.
+assert selections["CodexBarTests.Alpha"] < 30, selections
+assert selections["CodexBarTests.Beta"] == 30, selections
+assert "CodexBarTests.Epsilon" in selections, selections
+assert "CodexBarTests.`top level works`()" not in selections, selections
+PY
+
+ZERO_DURATIONS="${TEMP_DIR}/zero-durations.json"
+cat > "${ZERO_DURATIONS}" <<'JSON'
+{
+  "version": 1,
+  "selections": {
+    "CodexBarTests.Alpha": 5,
+    "CodexBarTests.Beta": 0,
+    "CodexBarTests.Gamma": 0
+  }
+}
+JSON
+reset_case zero-durations
+# Zero-second selections pile into an already used group; the unused packed group must be dropped.
+run_harness --group-size 4 --timeout 10 --durations "${ZERO_DURATIONS}" --target-group-seconds 1 --list-only \
+  | grep -v '^Discovered ' \
+  | sort > "${TEMP_DIR}/zero-durations.log"
+diff -u "${TEMP_DIR}/shards-expected.log" "${TEMP_DIR}/zero-durations.log"
+
 reset_case group-timeout
 export FAKE_SWIFT_MODE=group_timeout
 run_harness --group-size 4 --limit-groups 1 --timeout 1 > "${TEMP_DIR}/group-timeout.log"
@@ -235,6 +327,189 @@ set -e
 grep -Fq '| Full-group retries | `1` |' "${GITHUB_STEP_SUMMARY}"
 grep -Fq '| Recovered groups | `0` |' "${GITHUB_STEP_SUMMARY}"
 
+reset_case bisect-recovered
+export FAKE_SWIFT_MODE=group_timeout
+run_harness --group-size 4 --limit-groups 1 --timeout 1 --timeout-recovery bisect > "${TEMP_DIR}/bisect.log"
+grep -Fq "timed out; bisecting selections" "${TEMP_DIR}/bisect.log"
+grep -Fq '| Recovered groups | `1` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Bisection steps | `6` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Hung selections | `none` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Isolated selection retries | `0` |' "${GITHUB_STEP_SUMMARY}"
+
+reset_case bisect-culprit
+export FAKE_SWIFT_MODE=hang_gamma
+set +e
+run_harness --group-size 4 --limit-groups 2 --timeout 1 --timeout-recovery bisect > "${TEMP_DIR}/bisect-culprit.log" 2>&1
+bisect_status=$?
+set -e
+[[ "${bisect_status}" -eq 124 ]]
+grep -Fq "::error::Swift test selection CodexBarTests.Gamma timed out on its own" "${TEMP_DIR}/bisect-culprit.log"
+grep -Fq '| Bisection steps | `3` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Hung selections | `CodexBarTests.Gamma` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Recovered groups | `0` |' "${GITHUB_STEP_SUMMARY}"
+
+reset_case workers
+export FAKE_SWIFT_MODE=group_sleep
+run_harness --group-size 4 --timeout 10 --workers 3 > "${TEMP_DIR}/workers.log"
+grep -Fq '| Workers | `3` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| First-pass successful groups | `3` |' "${GITHUB_STEP_SUMMARY}"
+grep -Eq '\| Execution seconds \| `[0-2]\.' "${GITHUB_STEP_SUMMARY}"
+[[ "$(grep -c '^test --skip-build --no-parallel --ignore-lock' "${FAKE_SWIFT_LOG}")" -eq 3 ]]
+python3 - "${TEMP_DIR}/workers.log" <<'PY'
+import sys
+
+current = None
+groups = 0
+for line in open(sys.argv[1]).read().splitlines():
+    if line.startswith("::group::"):
+        assert current is None, line
+        current, groups = [], groups + 1
+    elif line == "::endgroup::":
+        # Buffered output: each section holds exactly one group's start/end pair.
+        assert [entry.split(" ", 1)[0] for entry in current] == ["start", "end"], current
+        assert current[0].split(" ", 1)[1] == current[1].split(" ", 1)[1], current
+        current = None
+    elif current is not None and line.startswith(("start ", "end ")):
+        current.append(line)
+assert groups == 3, groups
+PY
+
+reset_case workers-timeout
+export FAKE_SWIFT_MODE=group_timeout
+run_harness --group-size 4 --limit-groups 2 --timeout 1 --workers 2 > "${TEMP_DIR}/workers-timeout.log"
+grep -Fq '| Timed out groups | `2` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Recovered groups | `2` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Isolated selection retries | `8` |' "${GITHUB_STEP_SUMMARY}"
+
+DISCOVERY_CACHE="${TEMP_DIR}/discovery.json"
+export FAKE_SWIFT_MODE=success
+reset_case discovery-miss
+run_harness --group-size 4 --timeout 10 --discovery-cache "${DISCOVERY_CACHE}" > "${TEMP_DIR}/discovery-miss.log"
+grep -Fq '| Discovery cache | `miss` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fxq "test list" "${FAKE_SWIFT_LOG}"
+reset_case discovery-hit
+run_harness --group-size 4 --timeout 10 --discovery-cache "${DISCOVERY_CACHE}" > "${TEMP_DIR}/discovery-hit.log"
+grep -Fq '| Discovery cache | `hit` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Discovered selections | `10` |' "${GITHUB_STEP_SUMMARY}"
+[[ "$(grep -cFx "test list" "${FAKE_SWIFT_LOG}")" -eq 0 ]]
+[[ "$(head -n 1 "${FAKE_SWIFT_LOG}")" == "build --build-tests" ]]
+reset_case discovery-hit-list
+run_harness --group-size 4 --timeout 10 --discovery-cache "${DISCOVERY_CACHE}" --list-only \
+  | grep -v '^Discovered \|^Reusing ' \
+  | sort > "${TEMP_DIR}/discovery-hit-list.log"
+diff -u "${TEMP_DIR}/shards-expected.log" "${TEMP_DIR}/discovery-hit-list.log"
+[[ ! -s "${FAKE_SWIFT_LOG}" ]]
+reset_case discovery-hit-elsewhere
+# The fingerprint reads the package inputs from the repository root, not the working directory.
+(cd "${TEMP_DIR}" && run_harness --group-size 4 --timeout 10 --discovery-cache "${DISCOVERY_CACHE}" --list-only \
+  > "${TEMP_DIR}/discovery-hit-elsewhere.log")
+grep -Fq "Reusing 10 test selections" "${TEMP_DIR}/discovery-hit-elsewhere.log"
+python3 - "${ROOT_DIR}/Scripts/ci_swift_test_by_suite.py" "${TEMP_DIR}" <<'PY'
+import importlib.util
+import os
+import sys
+
+spec = importlib.util.spec_from_file_location("ci_swift_test_by_suite", sys.argv[1])
+runner = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = runner
+spec.loader.exec_module(runner)
+here = runner.discovery_fingerprint(["swift"])
+os.chdir(sys.argv[2])
+assert runner.discovery_fingerprint(["swift"]) == here
+runner.PACKAGE_ROOT = sys.argv[2]
+# With no package inputs every path hashes as missing, so a real root must fingerprint differently.
+assert runner.discovery_fingerprint(["swift"]) != here
+PY
+python3 - "${DISCOVERY_CACHE}" <<'PY'
+import json
+import sys
+
+cache = json.load(open(sys.argv[1]))
+cache["fingerprint"] = "stale"
+json.dump(cache, open(sys.argv[1], "w"))
+PY
+reset_case discovery-stale
+run_harness --group-size 4 --timeout 10 --discovery-cache "${DISCOVERY_CACHE}" > "${TEMP_DIR}/discovery-stale.log"
+grep -Fq '| Discovery cache | `miss` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fxq "test list" "${FAKE_SWIFT_LOG}"
+
+LEDGER="${TEMP_DIR}/ledger.json"
+for run in 1 2; do
+  reset_case "report-${run}"
+  export FAKE_SWIFT_MODE=flaky_eta
+  run_harness --group-size 4 --timeout 10 --report "${TEMP_DIR}/report.json" --junit "${TEMP_DIR}/junit.xml" \
+    --ledger "${LEDGER}" > "${TEMP_DIR}/report-${run}.log"
+done
+grep -Fq "Selection CodexBarTests.Eta failed with exit code 1; retrying it once" "${TEMP_DIR}/report-2.log"
+grep -Fq '| Flaky selections | `CodexBarTests.Eta` |' "${GITHUB_STEP_SUMMARY}"
+grep -Fq '| Slow-trending selections | `none` |' "${GITHUB_STEP_SUMMARY}"
+python3 - "${TEMP_DIR}/report.json" "${TEMP_DIR}/junit.xml" "${LEDGER}" <<'PY'
+import json
+import sys
+import xml.etree.ElementTree as ElementTree
+
+report = json.load(open(sys.argv[1]))
+assert report["exitCode"] == 0, report
+assert len(report["groups"]) == 3, report
+attempts = report["groups"][1]["attempts"]
+kinds = ["group", "group-retry", "isolated", "isolated-retry", "isolated", "isolated", "isolated"]
+assert [attempt["kind"] for attempt in attempts] == kinds, attempts
+assert [attempt["exitCode"] for attempt in attempts] == [1, 0, 1, 0, 0, 0, 0], attempts
+assert [attempt["kind"] for attempt in report["groups"][0]["attempts"]] == ["group"], report
+outcomes = {item["name"]: item for item in report["selections"]}
+# Only Eta failed on its own and then passed; its group mates passed alone.
+assert outcomes["CodexBarTests.Eta"]["outcome"] == "passed_on_retry", outcomes
+assert outcomes["CodexBarTests.Zeta"]["outcome"] == "passed", outcomes
+assert outcomes["CodexBarTests.Alpha"]["outcome"] == "passed", outcomes
+assert outcomes["CodexBarTests.Eta"]["estimatedSeconds"] is not None, outcomes
+assert report["summary"]["Recovered groups"] == "1", report
+
+suite = ElementTree.parse(sys.argv[2]).getroot().find("testsuite")
+assert suite.get("tests") == "10" and suite.get("failures") == "0", suite.attrib
+assert [case.get("name") for case in suite.findall("testcase") if case.find("system-out") is not None] == ["Eta"]
+
+ledger = json.load(open(sys.argv[3]))["selections"]
+assert [run["outcome"] for run in ledger["CodexBarTests.Eta"]["history"]] == ["passed_on_retry"] * 2, ledger
+assert not ledger["CodexBarTests.Alpha"]["flaky"] and not ledger["CodexBarTests.Zeta"]["flaky"], ledger
+assert ledger["CodexBarTests.Eta"]["flaky"], ledger
+PY
+
+reset_case outcome-failure
+export FAKE_SWIFT_MODE=fail_beta
+set +e
+run_harness --group-size 4 --limit-groups 1 --timeout 10 --report "${TEMP_DIR}/outcome-failure.json" \
+  > "${TEMP_DIR}/outcome-failure.log" 2>&1
+set -e
+reset_case outcome-bisect
+export FAKE_SWIFT_MODE=hang_gamma
+set +e
+run_harness --group-size 4 --limit-groups 2 --timeout 1 --timeout-recovery bisect \
+  --report "${TEMP_DIR}/outcome-bisect.json" > "${TEMP_DIR}/outcome-bisect.log" 2>&1
+set -e
+reset_case outcome-isolated
+set +e
+run_harness --group-size 4 --limit-groups 2 --timeout 1 --report "${TEMP_DIR}/outcome-isolated.json" \
+  > "${TEMP_DIR}/outcome-isolated.log" 2>&1
+set -e
+python3 - "${TEMP_DIR}"/outcome-{failure,bisect,isolated}.json <<'PY'
+import json
+import sys
+
+
+def outcomes(path):
+    report = json.load(open(path))
+    return {item["name"].split(".", 1)[1]: item["outcome"] for item in report["selections"]}
+
+
+failure, bisect, isolated = map(outcomes, sys.argv[1:])
+# Beta fails the group and its retry; no run singles it out, so no member is blamed.
+assert failure == dict.fromkeys(["Alpha", "Beta", "Delta", "Epsilon"], "indeterminate"), failure
+assert bisect["Alpha"] == "passed" and bisect["Gamma"] == "timed_out", bisect
+assert bisect["Eta"] == "passed" and bisect["Theta"] == bisect["Zeta"] == "indeterminate", bisect
+assert isolated["Eta"] == "passed" and isolated["Gamma"] == "timed_out", isolated
+assert isolated["Theta"] == isolated["Zeta"] == "indeterminate", isolated
+PY
+
 reset_case list-failure
 export FAKE_SWIFT_MODE=list_fail
 set +e
@@ -96,35 +96,276 @@ struct MiMoUsageScriptTests {
             expected: .init(input: 120, cacheCreate: 10, cacheRead: 5, output: 90, messages: 1))
     }
 
+    @Test
+    func `script parses only rows appended since the checkpoint`() throws {
+        let root = try self.makeRoot()
+        defer { try? FileManager.default.removeItem(at: root) }
+
+        try self.writeSessions(
+            ["session.jsonl": [self.assistantRow(outputTokens: 40, requestID: "req_one")]],
+            root: root)
+        self.assertUsage(
+            try self.runScript(root: root),
+            expected: .init(input: 120, cacheCreate: 10, cacheRead: 5, output: 40, messages: 1))
+
+        let session = self.projectsURL(root: root).appendingPathComponent("session.jsonl")
+        let handle = try FileHandle(forWritingTo: session)
+        try handle.seekToEnd()
+        try handle.write(contentsOf: Data("\n".utf8))
+        try handle.write(contentsOf: self.jsonl([self.assistantRow(outputTokens: 90, requestID: "req_two")]))
+        try handle.close()
+
+        self.assertUsage(
+            try self.runScript(root: root),
+            expected: .init(input: 240, cacheCreate: 20, cacheRead: 10, output: 130, messages: 2))
+        // An unchanged tree is skipped and keeps the checkpointed totals.
+        self.assertUsage(
+            try self.runScript(root: root),
+            expected: .init(input: 240, cacheCreate: 20, cacheRead: 10, output: 130, messages: 2))
+    }
+
+    @Test
+    func `script rescans replaced and removed session files`() throws {
+        let root = try self.makeRoot()
+        defer { try? FileManager.default.removeItem(at: root) }
+
+        try self.writeSessions([
+            "session-a.jsonl": [
+                self.assistantRow(outputTokens: 40, requestID: "req_one"),
+                self.assistantRow(outputTokens: 90, requestID: "req_two"),
+            ],
+            "session-b.jsonl": [self.assistantRow(outputTokens: 10, requestID: "req_three")],
+        ], root: root)
+        self.assertUsage(
+            try self.runScript(root: root),
+            expected: .init(input: 360, cacheCreate: 30, cacheRead: 15, output: 140, messages: 3))
+
+        try self.writeSessions(
+            ["session-a.jsonl": [self.assistantRow(outputTokens: 7, requestID: "req_four")]],
+            root: root)
+        try FileManager.default.removeItem(
+            at: self.projectsURL(root: root).appendingPathComponent("session-b.jsonl"))
+
+        self.assertUsage(
+            try self.runScript(root: root),
+            expected: .init(input: 120, cacheCreate: 10, cacheRead: 5, output: 7, messages: 1))
+    }
+
+    @Test
+    func `script restores a copied row when the winning file is removed`() throws {
+        let root = try self.makeRoot()
+        defer { try? FileManager.default.removeItem(at: root) }
+
+        let now = Date()
+        try self.writeSessions([
+            "session.jsonl": [self.assistantRow(outputTokens: 40, timestamp: now.addingTimeInterval(-5))],
+            "session-copy.jsonl": [self.assistantRow(outputTokens: 90, timestamp: now)],
+        ], root: root)
+        self.assertUsage(
+            try self.runScript(root: root),
+            expected: .init(input: 120, cacheCreate: 10, cacheRead: 5, output: 90, messages: 1))
+
+        try FileManager.default.removeItem(
+            at: self.projectsURL(root: root).appendingPathComponent("session-copy.jsonl"))
+
+        self.assertUsage(
+            try self.runScript(root: root),
+            expected: .init(input: 120, cacheCreate: 10, cacheRead: 5, output: 40, messages: 1))
+    }
+
+    @Test
+    func `parallel scan matches the serial scan`() throws {
+        let root = try self.makeRoot()
+        defer { try? FileManager.default.removeItem(at: root) }
+
+        let now = Date()
+        var files: [String: [[String: Any]]] = [:]
+        for index in 0..<8 {
+            files["session-\(index).jsonl"] = (0..<6).map { step in
+                self.assistantRow(
+                    outputTokens: 10 * (index + step),
+                    sessionID: step.isMultiple(of: 3) ? nil : "session_\(index)",
+                    requestID: step.isMultiple(of: 2) ? "req_\(step)" : nil,
+                    timestamp: now.addingTimeInterval(Double(index - step)))
+            }
+        }
+        try self.writeSessions(files, root: root)
+
+        let parallel = try self.runScriptWindows(root: root, arguments: ["--jobs", "4"])
+        let serial = try self.runScriptWindows(root: root, arguments: ["--rescan"])
+
+        #expect(NSDictionary(dictionary: parallel).isEqual(to: serial))
+    }
+
+    @Test
+    func `script writes daily history from the rollup`() throws {
+        let root = try self.makeRoot()
+        defer { try? FileManager.default.removeItem(at: root) }
+
+        let now = Date()
+        let earlier = now.addingTimeInterval(-3 * 86400)
+        try self.writeSessions([
+            "session.jsonl": [
+                self.assistantRow(outputTokens: 40, requestID: "req_old", timestamp: earlier),
+                self.assistantRow(outputTokens: 90, requestID: "req_new", timestamp: now),
+            ],
+        ], root: root)
+
+        let payload = try self.runScriptPayload(root: root)
+        let daily = try #require(payload["daily"] as? [[String: Any]])
+        let formatter = ISO8601DateFormatter()
+        formatter.formatOptions = [.withFullDate]
+        #expect(daily.compactMap { $0["date"] as? String } == [
+            formatter.string(from: earlier),
+            formatter.string(from: now),
+        ])
+        #expect(daily.compactMap { $0["output"] as? Int } == [40, 90])
+        #expect(daily.compactMap { $0["messages"] as? Int } == [1, 1])
+    }
+
+    @Test
+    func `script deduplicates across roots and breaks totals down per root`() throws {
+        let root = try self.makeRoot()
+        defer { try? FileManager.default.removeItem(at: root) }
+
+        let now = Date()
+        try self.writeSessions([
+            "session.jsonl": [self.assistantRow(outputTokens: 60, requestID: "req_shared", timestamp: now)],
+        ], root: root)
+        let work = root.appendingPathComponent("work/.claude/projects/project-b")
+        try FileManager.default.createDirectory(at: work, withIntermediateDirectories: true)
+        try self.jsonl([
+            self.assistantRow(outputTokens: 40, requestID: "req_shared", timestamp: now.addingTimeInterval(-60)),
+            self.assistantRow(outputTokens: 90, requestID: "req_work", timestamp: now),
+        ]).write(to: work.appendingPathComponent("session.jsonl"), options: .atomic)
+
+        let homes = [root.appendingPathComponent("mimo").path, root.appendingPathComponent("work").path]
+        let payload = try self.runScriptPayload(
+            root: root,
+            environment: ["MIMO_CLAUDE_HOMES": homes.joined(separator: ":")])
+
+        let allTime = try #require((payload["windows"] as? [String: Any])?["all_time"] as? [String: Any])
+        #expect(allTime["messages"] as? Int == 2)
+        #expect(allTime["output"] as? Int == 150)
+        let roots = try #require(payload["roots"] as? [String: [String: Any]])
+        for (name, output) in [("mimo", 60), ("work", 90)] {
+            let windows = try #require(roots[name]?["windows"] as? [String: Any])
+            let rootAllTime = try #require(windows["all_time"] as? [String: Any])
+            #expect(rootAllTime["messages"] as? Int == 1)
+            #expect(rootAllTime["output"] as? Int == output)
+        }
+    }
+
+    @Test
+    func `watch mode rewrites the cache after an append`() throws {
+        let root = try self.makeRoot()
+        defer { try? FileManager.default.removeItem(at: root) }
+
+        try self.writeSessions(
+            ["session.jsonl": [self.assistantRow(outputTokens: 40, requestID: "req_one")]],
+            root: root)
+        let cache = root.appendingPathComponent("usage.json")
+        let process = Process()
+        process.executableURL = URL(fileURLWithPath: "/usr/bin/env")
+        process.arguments = ["python3", self.scriptURL.path, "--watch", "--poll-interval", "0.2"]
+        process.environment = ProcessInfo.processInfo.environment.merging([
+            "MIMO_CLAUDE_HOME": root.appendingPathComponent("mimo").path,
+            "MIMO_LOCAL_USAGE_PATH": cache.path,
+        ]) { _, new in new }
+        try process.run()
+        defer {
+            process.terminate()
+            process.waitUntilExit()
+        }
+
+        #expect(self.waitForMessages(1, cache: cache))
+        let session = self.projectsURL(root: root).appendingPathComponent("session.jsonl")
+        let handle = try FileHandle(forWritingTo: session)
+        try handle.seekToEnd()
+        try handle.write(contentsOf: Data("\n".utf8))
+        try handle.write(contentsOf: self.jsonl([self.assistantRow(outputTokens: 90, requestID: "req_two")]))
+        try handle.close()
+
+        #expect(self.waitForMessages(2, cache: cache))
+    }
+
+    private func waitForMessages(_ messages: Int, cache: URL, timeout: TimeInterval = 10) -> Bool {
+        let deadline = Date().addingTimeInterval(timeout)
+        while Date() < deadline {
+            if let data = try? Data(contentsOf: cache),
+               let payload = try? JSONSerialization.jsonObject(with: data) as? [String: Any],
+               let windows = payload["windows"] as? [String: Any],
+               let allTime = windows["all_time"] as? [String: Any],
+               allTime["messages"] as? Int == messages
+            {
+                return true
+            }
+            Thread.sleep(forTimeInterval: 0.05)
+        }
+        return false
+    }
+
     private func runScript(files: [String: [[String: Any]]]) throws -> [String: Any] {
+        let root = try self.makeRoot()
+        defer { try? FileManager.default.removeItem(at: root) }
+        try self.writeSessions(files, root: root)
+        return try self.runScript(root: root)
+    }
+
+    private func makeRoot() throws -> URL {
         let root = FileManager.default.temporaryDirectory
             .appendingPathComponent("mimo-usage-script-\(UUID().uuidString)")
-        defer { try? FileManager.default.removeItem(at: root) }
+        try FileManager.default.createDirectory(
+            at: self.projectsURL(root: root),
+            withIntermediateDirectories: true)
+        return root
+    }
 
-        let mimoHome = root.appendingPathComponent("mimo")
-        let projects = mimoHome
+    private func projectsURL(root: URL) -> URL {
+        root.appendingPathComponent("mimo")
             .appendingPathComponent(".claude")
             .appendingPathComponent("projects")
             .appendingPathComponent("project-a")
-        try FileManager.default.createDirectory(at: projects, withIntermediateDirectories: true)
+    }
 
+    private func jsonl(_ rows: [[String: Any]]) throws -> Data {
+        let lines = try rows
+            .map { try JSONSerialization.data(withJSONObject: $0) }
+            .map { try #require(String(bytes: $0, encoding: .utf8)) }
+        return Data(lines.joined(separator: "\n").utf8)
+    }
+
+    private func writeSessions(_ files: [String: [[String: Any]]], root: URL) throws {
+        let projects = self.projectsURL(root: root)
         for (name, rows) in files {
-            let session = projects.appendingPathComponent(name)
-            let jsonl = try rows
-                .map { try JSONSerialization.data(withJSONObject: $0) }
-                .map { try #require(String(bytes: $0, encoding: .utf8)) }
-                .joined(separator: "\n")
-            try jsonl.write(to: session, atomically: true, encoding: .utf8)
+            try self.jsonl(rows).write(to: projects.appendingPathComponent(name), options: .atomic)
         }
+    }
+
+    private func runScript(root: URL) throws -> [String: Any] {
+        let windows = try self.runScriptWindows(root: root)
+        return try #require(windows["all_time"] as? [String: Any])
+    }
 
+    private func runScriptWindows(root: URL, arguments: [String] = []) throws -> [String: Any] {
+        let payload = try self.runScriptPayload(root: root, arguments: arguments)
+        return try #require(payload["windows"] as? [String: Any])
+    }
+
+    private func runScriptPayload(
+        root: URL,
+        arguments: [String] = [],
+        environment: [String: String] = [:]) throws -> [String: Any]
+    {
+        let mimoHome = root.appendingPathComponent("mimo")
         let cache = root.appendingPathComponent("usage.json")
         let process = Process()
         process.executableURL = URL(fileURLWithPath: "/usr/bin/env")
-        process.arguments = ["python3", self.scriptURL.path, "--update"]
+        process.arguments = ["python3", self.scriptURL.path, "--update"] + arguments
         process.environment = ProcessInfo.processInfo.environment.merging([
             "MIMO_CLAUDE_HOME": mimoHome.path,
             "MIMO_LOCAL_USAGE_PATH": cache.path,
-        ]) { _, new in new }
+        ].merging(environment) { _, new in new }) { _, new in new }
         let stderr = Pipe()
         process.standardError = stderr
 
@@ -136,10 +377,8 @@ struct MiMoUsageScriptTests {
             encoding: .utf8))
         #expect(process.terminationStatus == 0, Comment(rawValue: errorText))
 
-        let payload = try #require(
+        return try #require(
             JSONSerialization.jsonObject(with: Data(contentsOf: cache)) as? [String: Any])
-        let windows = try #require(payload["windows"] as? [String: Any])
-        return try #require(windows["all_time"] as? [String: Any])
     }
 
     private func assertUsage(_ allTime: [String: Any], expected: UsageExpectation) {
@@ -161,11 +400,12 @@ struct MiMoUsageScriptTests {
     private func assistantRow(
         outputTokens: Int,
         sessionID: String? = "session_stream",
-        requestID: String? = "req_stream") -> [String: Any]
+        requestID: String? = "req_stream",
+        timestamp: Date = Date()) -> [String: Any]
     {
         var row: [String: Any] = [
             "type": "assistant",
-            "timestamp": ISO8601DateFormatter().string(from: Date()),
+            "timestamp": ISO8601DateFormatter().string(from: timestamp),
             "message": [
                 "id": "msg_stream",
                 "usage": [